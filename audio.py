@@ -0,0 +1,136 @@
+# Звук пульта. Симуляция только кладёт события движка ('az5', 'saor',
+# 'explosion', 'az5_stop') в очередь, а все вызовы микшера делает отдельный
+# поток — шаг физики и кадр никогда не ждут звук. Под тревоги зарезервированы
+# свои каналы, правила приоритета живут в одном месте:
+#   - взрыв один раз за сессию и обрывает петлю АЗ-5;
+#   - петля АЗ-5 не перезапускается, пока играет, и не стартует после взрыва;
+#   - САОР накладывается поверх тревоги на своём канале.
+# NullBackend ничего не играет (headless, пакетные прогоны), но помнит, что
+# было бы сыграно.
+import os
+import queue
+import threading
+
+SOUNDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sounds')
+SOUNDS = {
+    'az5': 'alarm-az-5fast.ogg',
+    'explosion': 'alarm-explosive.ogg',
+    'saor': 'alarm-saor.ogg',
+}
+# Зарезервированные каналы: тревоги не отнимаются у других звуков и друг у друга
+CHANNELS = {
+    'az5': 0,
+    'explosion': 1,
+    'saor': 2,
+}
+
+
+class NullBackend:
+    def __init__(self):
+        self.log = []
+
+    def load(self):
+        return True
+
+    def play(self, name, loops=0):
+        self.log.append(('play', name, loops))
+
+    def stop(self, name):
+        self.log.append(('stop', name))
+
+    def stop_all(self):
+        self.log.append(('stop_all',))
+
+
+class PygameBackend:
+    def __init__(self, sounds_dir=SOUNDS_DIR):
+        self.sounds_dir = sounds_dir
+        self.sounds = {}
+        self.channels = {}
+
+    def load(self):
+        # Микшер и декодирование OGG; без звуковой карты — False, пульт молчит
+        import pygame
+        try:
+            pygame.mixer.init()
+            pygame.mixer.set_reserved(len(CHANNELS))
+            self.sounds = {name: pygame.mixer.Sound(os.path.join(self.sounds_dir, file))
+                           for name, file in SOUNDS.items()}
+        except (pygame.error, FileNotFoundError):
+            return False
+        self.channels = {name: pygame.mixer.Channel(k) for name, k in CHANNELS.items()}
+        return True
+
+    def play(self, name, loops=0):
+        self.channels[name].play(self.sounds[name], loops=loops)
+
+    def stop(self, name):
+        self.channels[name].stop()
+
+    def stop_all(self):
+        for channel in self.channels.values():
+            channel.stop()
+
+
+class AudioManager:
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else NullBackend()
+        self.commands = queue.SimpleQueue()
+        self.thread = None
+        self.ready = False
+        # Состояние ведёт сам менеджер — опрашивать get_busy() не нужно
+        self.az5_looping = False
+        self.exploded = False
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='audio', daemon=True)
+        self.thread.start()
+        return self
+
+    def post(self, event):
+        self.commands.put(event)
+
+    def post_events(self, events):
+        for event in events:
+            self.commands.put(event)
+
+    def close(self):
+        if self.thread is not None:
+            self.commands.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        self.ready = self.backend.load()
+        while True:
+            event = self.commands.get()
+            if event is None:
+                break
+            if self.ready:
+                self.handle(event)
+
+    def handle(self, event):
+        # Правила приоритета; вызывается только из потока звука
+        backend = self.backend
+        if event == 'az5':
+            if not self.az5_looping and not self.exploded:
+                backend.play('az5', loops=-1)
+                self.az5_looping = True
+        elif event == 'az5_stop':
+            if self.az5_looping:
+                backend.stop('az5')
+                self.az5_looping = False
+        elif event == 'saor':
+            backend.play('saor')
+        elif event == 'explosion':
+            if self.az5_looping:
+                backend.stop('az5')
+                self.az5_looping = False
+            if not self.exploded:
+                backend.play('explosion')
+                self.exploded = True
+        elif event == 'reset':
+            # Перемотка: звук прошлого момента больше не относится к пульту
+            backend.stop_all()
+            self.az5_looping = False
+            self.exploded = False
@@ -0,0 +1,248 @@
+# Пакетный прогон сценариев «что если» на пуле процессов.
+# Сценарии задаются сеткой параметров или случайными действиями оператора,
+# результаты построчно пишутся в JSONL, в памяти держится только сводка.
+#
+#   python batch.py grid --az5 none,60,120 --cooling normal,low --auto-protect on,off
+#   python batch.py --seed 42 -o results.jsonl random --runs 100000
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from reactor import ReactorSim, TICK
+
+DEFAULT_DURATION = 600
+CHUNK_SIZE = 64
+
+
+# --- Сценарии ---
+
+def withdrawal_plan(sim, interval, start=0):
+    # Базовый план: каждые interval секунд поднимаем очередную группу из 4 стержней
+    cells = list(zip(sim.rods.i.tolist(), sim.rods.j.tolist()))
+    actions = []
+    t = start
+    for k in range(0, len(cells), 4):
+        actions.append((t, 'reset_selection'))
+        for cell in cells[k:k + 4]:
+            actions.append((t, 'select_rod') + cell)
+        actions.append((t, 'raise_rods'))
+        t += interval
+    return actions
+
+
+def grid_actions(sim, params):
+    actions = withdrawal_plan(sim, params['raise_interval'])
+    if params['cooling'] != 'normal':
+        name = 'toggle_cooling_low' if params['cooling'] == 'low' else 'toggle_cooling_high'
+        actions.append((params['cooling_at'], name))
+    if params['saor_at'] is not None:
+        actions.append((params['saor_at'], 'saor_action'))
+    if params['az5_at'] is not None:
+        actions.append((params['az5_at'], 'az5_action'))
+    return actions
+
+
+def random_actions(sim, rng, duration):
+    # Случайный оператор: подъёмы групп стержней, переключения ГЦН, САОР, АЗ-5
+    cells = list(zip(sim.rods.i.tolist(), sim.rods.j.tolist()))
+    actions = []
+    for _ in range(rng.randint(1, 20)):
+        t = rng.uniform(0, duration)
+        actions.append((t, 'reset_selection'))
+        for cell in rng.sample(cells, rng.randint(1, 4)):
+            actions.append((t, 'select_rod') + cell)
+        actions.append((t, rng.choice(('raise_rods', 'raise_rods', 'lower_rods'))))
+    for _ in range(rng.randint(0, 3)):
+        name = rng.choice(('toggle_cooling_low', 'toggle_cooling_high'))
+        actions.append((rng.uniform(0, duration), name))
+    if rng.random() < 0.5:
+        actions.append((rng.uniform(0, duration), 'saor_action'))
+    if rng.random() < 0.5:
+        actions.append((rng.uniform(0, duration), 'az5_action'))
+    return actions
+
+
+def run_actions(sim, actions, duration):
+    # Прогоняет действия оператора до duration, собирая исходы сценария.
+    # Каждое действие — точно в свой момент (advance_to), как в scenario.run,
+    # а не на ближайшей целой секунде; последняя запись — конец прогона
+    peak_sfkre = sim.sfkre
+    pending = sorted((a for a in actions if a[0] < duration), key=lambda a: a[0])
+    pending.append((duration, None))
+    for action in pending:
+        # Шаги не длиннее TICK: пик СФКРЭ снимается после каждого шага физики
+        while sim.time < action[0] and not sim.exploded:
+            sim.advance_to(min(action[0], sim.time + TICK))
+            peak_sfkre = max(peak_sfkre, sim.sfkre)
+        if sim.exploded:
+            break
+        if action[1] is not None:
+            getattr(sim, action[1])(*action[2:])
+    return {
+        'exploded': sim.exploded,
+        'explosion_time': sim.explosion_time,
+        'peak_sfkre': peak_sfkre,
+        'az5_count': sim.az5_count,
+        'final_temperature': sim.temperature,
+    }
+
+
+def run_one(run_id, seed, params):
+    # Сид сценария зависит только от базового сида и номера прогона,
+    # поэтому результат не зависит от числа процессов и порядка выполнения
+    rng = random.Random(f"{seed}:{run_id}")
+    sim = ReactorSim()
+    duration = params['duration']
+    if params['mode'] == 'random':
+        sim.auto_protection_enabled = rng.random() < 0.5
+        actions = random_actions(sim, rng, duration)
+    else:
+        sim.auto_protection_enabled = params['auto_protect']
+        actions = grid_actions(sim, params)
+    result = {'run_id': run_id, 'seed': seed, 'auto_protect': sim.auto_protection_enabled}
+    if params['mode'] == 'grid':
+        result['params'] = params
+    result.update(run_actions(sim, actions, duration))
+    return result
+
+
+def run_chunk(chunk):
+    return [run_one(*job) for job in chunk]
+
+
+# --- Сводка ---
+
+class Summary:
+    def __init__(self):
+        self.runs = 0
+        self.exploded = 0
+        self.explosion_time_sum = 0.0
+        self.first_explosion = None
+        self.peak_sfkre = 0
+        self.peak_sfkre_sum = 0
+        self.az5_total = 0
+
+    def add(self, result):
+        self.runs += 1
+        self.peak_sfkre = max(self.peak_sfkre, result['peak_sfkre'])
+        self.peak_sfkre_sum += result['peak_sfkre']
+        self.az5_total += result['az5_count']
+        if result['exploded']:
+            t = result['explosion_time']
+            self.exploded += 1
+            self.explosion_time_sum += t
+            if self.first_explosion is None or t < self.first_explosion:
+                self.first_explosion = t
+
+    def as_dict(self):
+        return {
+            'runs': self.runs,
+            'exploded': self.exploded,
+            'explosion_rate': self.exploded / self.runs if self.runs else 0,
+            'mean_time_to_explosion': self.explosion_time_sum / self.exploded if self.exploded else None,
+            'min_time_to_explosion': self.first_explosion,
+            'peak_sfkre': self.peak_sfkre,
+            'mean_peak_sfkre': self.peak_sfkre_sum / self.runs if self.runs else 0,
+            'az5_triggers': self.az5_total,
+        }
+
+
+# --- Генерация заданий ---
+
+def parse_list(text, convert=str):
+    return [None if v == 'none' else convert(v) for v in text.split(',')]
+
+
+def grid_jobs(args):
+    keys = ('az5_at', 'cooling', 'saor_at', 'auto_protect', 'raise_interval')
+    values = (
+        parse_list(args.az5, float),
+        parse_list(args.cooling),
+        parse_list(args.saor, float),
+        [v == 'on' for v in parse_list(args.auto_protect)],
+        parse_list(args.raise_interval, float),
+    )
+    run_id = 0
+    for _ in range(args.repeat):
+        for combo in itertools.product(*values):
+            params = dict(zip(keys, combo))
+            params.update(mode='grid', duration=args.duration, cooling_at=args.cooling_at)
+            yield run_id, args.seed, params
+            run_id += 1
+
+
+def random_jobs(args):
+    params = {'mode': 'random', 'duration': args.duration}
+    for run_id in range(args.runs):
+        yield run_id, args.seed, params
+
+
+def chunked(jobs, size):
+    it = iter(jobs)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(jobs, out, workers=None, chunk_size=CHUNK_SIZE):
+    # Держим в очереди ограниченное число пачек, чтобы 100k прогонов
+    # не висели в памяти фьючерсами
+    workers = workers or os.cpu_count()
+    summary = Summary()
+    chunks = chunked(jobs, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in itertools.islice(chunks, workers * 2):
+            pending.add(pool.submit(run_chunk, chunk))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    summary.add(result)
+                    out.write(json.dumps(result, ensure_ascii=False) + '\n')
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(pool.submit(run_chunk, chunk))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный прогон сценариев РБМК-1000")
+    parser.add_argument('-o', '--output', default='-', help="файл JSONL с результатами ('-' — stdout)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="число процессов (по умолчанию все ядра)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="секунды симуляции на прогон")
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    grid = sub.add_parser('grid', help="сетка сценариев")
+    grid.add_argument('--az5', default='none', help="время нажатия АЗ-5, список через запятую")
+    grid.add_argument('--cooling', default='normal', help="режим ГЦН: normal,low,high")
+    grid.add_argument('--cooling-at', type=float, default=0, help="когда переключить ГЦН")
+    grid.add_argument('--saor', default='none', help="время нажатия САОР")
+    grid.add_argument('--auto-protect', default='on', help="АПЗ: on,off")
+    grid.add_argument('--raise-interval', default='10', help="секунд между подъёмами групп стержней")
+    grid.add_argument('--repeat', type=int, default=1)
+
+    rnd = sub.add_parser('random', help="случайные действия оператора")
+    rnd.add_argument('--runs', type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    jobs = grid_jobs(args) if args.mode == 'grid' else random_jobs(args)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        summary = run_batch(jobs, out, args.workers)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary.as_dict(), ensure_ascii=False, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
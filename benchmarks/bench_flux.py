@@ -0,0 +1,39 @@
+# Стоимость одного шага поля потока в зависимости от размера зоны.
+# Бюджет: шаг должен быть намного дешевле кадра 60 FPS (16.7 мс).
+#
+#   python benchmarks/bench_flux.py
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from flux import FluxField  # noqa: E402
+from rods import core_cells  # noqa: E402
+
+FRAME_BUDGET_MS = 1000 / 60
+GRIDS = (9, 25, 49, 101, 201)
+
+
+def bench(grid, dt=1.0, repeat=5):
+    mask = np.zeros((grid, grid), dtype=bool)
+    mask[core_cells(grid, grid // 2 - 0.5)] = True
+    field = FluxField(mask)
+    rng = np.random.default_rng(0)
+    insertion = rng.random(mask.shape)
+    field.step(dt, insertion)
+    number = max(1, 20000 // grid)
+    best = min(timeit.repeat(lambda: field.step(dt, insertion), number=number, repeat=repeat))
+    return int(mask.sum()), best / number * 1000
+
+
+def main():
+    print(f"{'сетка':>7} {'каналов':>8} {'мс/шаг':>9} {'шагов/кадр':>11}")
+    for grid in GRIDS:
+        channels, ms = bench(grid)
+        print(f"{grid:>4}x{grid:<3}{channels:>8} {ms:>9.4f} {FRAME_BUDGET_MS / ms:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Микробенчмарк точечной кинетики: сколько стоит одна секунда симуляции.
+# Бюджет — 1 мс на секунду даже на самом жёстком участке (сброс АЗ-5),
+# иначе кинетика не уместится ни в кадр 60 FPS, ни в пакетный прогон.
+# При превышении бюджета скрипт завершается с кодом 1.
+#
+#   python benchmarks/bench_kinetics.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from kinetics import BETA, PointKinetics  # noqa: E402
+
+BUDGET_MS = 1.0
+
+# (название, реактивность в $ по секундам)
+CASES = (
+    ('стационар', [0.0] * 60),
+    ('разгон +0.3$', [0.3] * 60),
+    ('сброс АЗ-5', [0.3, -2.0, -3.0, -4.0, -5.0] + [-5.0] * 55),
+    ('мгновенная критичность', [1.2] * 5 + [-5.0] * 55),
+)
+
+
+def bench(profile, repeat=20):
+    # Для каждой секунды берём лучшее из повторов (отсекает шум планировщика),
+    # затем среднее и худшее по сценарию
+    best = [float('inf')] * len(profile)
+    for _ in range(repeat):
+        k = PointKinetics(1.0)
+        for s, rho in enumerate(profile):
+            t = time.perf_counter()
+            k.advance(1.0, rho * BETA)
+            best[s] = min(best[s], time.perf_counter() - t)
+    return sum(best) / len(best) * 1000, max(best) * 1000
+
+
+def main():
+    failed = False
+    print(f"{'сценарий':<24} {'мс/с средн':>11} {'мс/с худш':>10}")
+    for name, profile in CASES:
+        mean, worst = bench(profile)
+        mark = '' if worst < BUDGET_MS else '  > бюджета!'
+        failed = failed or bool(mark)
+        print(f"{name:<24} {mean:>11.4f} {worst:>10.4f}{mark}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# Набор бенчмарков в духе asv: шаг физики при разном числе стержней, прогон
+# сценария, кадр пульта на внеэкранной поверхности (SDL dummy) и холодный
+# старт main.py со шрифтами и звуками. Результаты каждого прогона пишутся в
+# benchmarks/results/<коммит>.json, чтобы регрессии были видны между коммитами.
+#
+#   python benchmarks/suite.py                      # прогнать и сохранить
+#   python benchmarks/suite.py -k step              # только бенчмарки с 'step' в имени
+#   python benchmarks/suite.py --compare HEAD~1     # сравнить с прогоном другого коммита
+#   python benchmarks/suite.py --history            # таблица по всем сохранённым прогонам
+#
+# При --compare код возврата 1, если что-то замедлилось больше порога.
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+sys.path.insert(0, ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+REGRESSION = 1.10  # во сколько раз медленнее считается регрессией
+
+BENCHMARKS = []
+
+
+def benchmark(name, number=100, repeat=7):
+    # setup() возвращает функцию, время одного вызова которой и меряется
+    def register(setup):
+        BENCHMARKS.append((name, setup, number, repeat))
+        return setup
+    return register
+
+
+# --- Физика ---
+
+def raised_sim(grid, radius, rod_cells=None):
+    # Реактор в установившемся режиме на мощности: поднят каждый 8-й стержень,
+    # ГЦН усилены — за время замера не взрывается, не глушится и кинетика
+    # не в переходном процессе
+    from reactor import ReactorSim
+    sim = ReactorSim(grid, radius, rod_cells)
+    mask = np.zeros(len(sim.rods), dtype=bool)
+    mask[::8] = True
+    sim.rods.set_selection(mask)
+    sim.raise_rods()
+    sim.rods.clear_selection()
+    sim.toggle_cooling_high()
+    sim.run(600)
+    return sim
+
+
+def step_case(grid, radius, rbmk=False):
+    def setup():
+        from reactor import TICK
+        from rods import rbmk_rod_cells
+        sim = raised_sim(grid, radius, rbmk_rod_cells(grid, radius) if rbmk else None)
+        return lambda: sim.step(TICK)
+    return setup
+
+
+benchmark('step.rods_61')(step_case(9, 4.3))
+benchmark('step.rods_213_rbmk')(step_case(49, 23, rbmk=True))
+benchmark('step.rods_489')(step_case(25, 12.5))
+benchmark('step.rods_1661', number=20)(step_case(49, 23))
+
+
+@benchmark('scenario.fast_forward_1h', number=1, repeat=3)
+def scenario_fast_forward():
+    # Час сценария: подъём групп стержней, маловодный режим ГЦН, АЗ-5
+    from batch import run_actions, withdrawal_plan
+    from reactor import ReactorSim
+
+    def run():
+        sim = ReactorSim()
+        actions = withdrawal_plan(sim, 30) + [(1200, 'toggle_cooling_low'), (2400, 'az5_action')]
+        run_actions(sim, actions, 3600)
+    return run
+
+
+@benchmark('fleet.step_100', number=10)
+def fleet_step():
+    from fleet import ReactorFleet
+    from reactor import TICK
+    fleet = ReactorFleet(100)
+    for sim in fleet:
+        sim.rods.set_selection(np.arange(len(sim.rods)) % 8 == 0)
+        sim.raise_rods()
+        sim.toggle_cooling_high()
+    fleet.run(600)
+    return lambda: fleet.step(TICK)
+
+
+# --- Отрисовка ---
+
+def panel():
+    import main
+    if main.screen is None:
+        main.init_pygame()
+        for b in main.buttons:
+            b.prerender()
+    return main
+
+
+@benchmark('render.full_frame', number=50)
+def render_full_frame():
+    # Полный кадр без кэша отрисовки: стержни, лампы, кнопки, ключ
+    main = panel()
+    import pygame
+    surf = pygame.Surface(main.screen.get_size()).convert()
+    atlas = main.make_rod_atlas()
+
+    def frame():
+        surf.fill(main.PANEL_BG)
+        main.draw_rods(surf, atlas)
+        main.draw_lamp_counter(surf, *main.LAMP_POS, main.sim.sfkre)
+        main.draw_info(surf)
+        for b in main.buttons:
+            b.draw_shadow(surf)
+            b.draw(surf)
+        main.az5_btn.draw(surf)
+        main.muf_switch.draw_base(surf)
+        main.muf_switch.draw(surf)
+    return frame
+
+
+@benchmark('render.dirty_frame', number=200)
+def render_dirty_frame():
+    # Кадр рабочего цикла: меняются показания и пара стержней
+    main = panel()
+    renderer = main.build_renderer()
+    renderer.render()
+    sim = main.sim
+    state = {'k': 0}
+
+    def frame():
+        k = state['k'] = (state['k'] + 1) % len(sim.rods)
+        sim.rods.state[k] ^= 2
+        sim.kinetics.n += 1e-3
+        renderer.render()
+    return frame
+
+
+@benchmark('render.cartogram_1661_4k', number=50)
+def render_cartogram_4k():
+    # Картограмма полной зоны на экране 4K: у десятой части стержней меняется
+    # состояние, слой дорисовывает их из атласа одним Surface.blits
+    main = panel()
+    import pygame
+    from reactor import ReactorSim
+    from render import DirtyRenderer, TileLayer
+    small_sim, size = main.sim, main.screen.get_size()
+    main.sim = sim = ReactorSim(*main.CORES['rbmk'])
+    main.set_layout((3840, 2160))
+    surf = pygame.Surface((3840, 2160)).convert()
+    surf.fill(main.PANEL_BG)
+    codes = lambda: np.where(sim.rods.selected, main.SELECTED, sim.rods.state)
+    layer = TileLayer(main.rod_rects, codes, main.make_rod_atlas())
+    # Глобальная раскладка пульта — обратно, слой живёт со своей
+    main.sim = small_sim
+    main.set_layout(size)
+    renderer = DirtyRenderer(surf, surf)
+    layer.render(renderer, True)
+    state = {'k': 0}
+
+    def frame():
+        k = state['k'] = (state['k'] + 1) % 10
+        sim.rods.state[k::10] ^= 2
+        layer.render(renderer, False)
+    return frame
+
+
+# --- Запуск ---
+
+STARTUP = "import main; main.init_pygame(); main.build_renderer().render()"
+STARTUP_AUDIO = STARTUP + "; import audio; audio.PygameBackend().load()"
+
+
+def startup_case(code):
+    def setup():
+        def run():
+            subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return run
+    return setup
+
+
+# Новый интерпретатор: импорт, окно, шрифты, первый кадр; и то же со звуком
+benchmark('startup.first_frame', number=1, repeat=5)(startup_case(STARTUP))
+benchmark('startup.with_audio', number=1, repeat=5)(startup_case(STARTUP_AUDIO))
+
+
+# --- Хранение результатов ---
+
+def commit_id(ref='HEAD'):
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', ref], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def result_path(commit):
+    return os.path.join(RESULTS_DIR, f"{commit}.json")
+
+
+def load(commit):
+    with open(result_path(commit), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_all(selected):
+    results = {}
+    for name, setup, number, repeat in BENCHMARKS:
+        if selected and not any(s in name for s in selected):
+            continue
+        fn = setup()
+        fn()  # прогрев
+        best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+        results[name] = best
+        print(f"{name:<28} {format_time(best):>12}", flush=True)
+    return results
+
+
+def format_time(seconds):
+    if seconds >= 1:
+        return f"{seconds:.3f} с"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} мс"
+    return f"{seconds * 1e6:.1f} мкс"
+
+
+def compare(base, head, threshold=REGRESSION):
+    regressed = False
+    print(f"{'бенчмарк':<28} {base['commit']:>12} {head['commit']:>12} {'отношение':>10}")
+    for name, t in head['results'].items():
+        old = base['results'].get(name)
+        if old is None:
+            print(f"{name:<28} {'—':>12} {format_time(t):>12}")
+            continue
+        ratio = t / old
+        mark = '  регрессия' if ratio > threshold else ''
+        regressed = regressed or bool(mark)
+        print(f"{name:<28} {format_time(old):>12} {format_time(t):>12} {ratio:>9.2f}x{mark}")
+    return regressed
+
+
+def history():
+    runs = []
+    for path in glob.glob(os.path.join(RESULTS_DIR, '*.json')):
+        with open(path, encoding='utf-8') as f:
+            runs.append(json.load(f))
+    runs.sort(key=lambda r: r['date'])
+    names = sorted({name for r in runs for name in r['results']})
+    print(f"{'коммит':<10} {'дата':<20}" + ''.join(f" {n.split('.')[-1][:14]:>14}" for n in names))
+    for r in runs:
+        cells = ''.join(f" {format_time(r['results'][n]) if n in r['results'] else '—':>14}" for n in names)
+        print(f"{r['commit']:<10} {r['date']:<20}{cells}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки РБМК-1000")
+    parser.add_argument('-k', dest='select', action='append', default=[], help="подстрока имени бенчмарка")
+    parser.add_argument('--compare', metavar='REF', help="сравнить с сохранённым прогоном коммита")
+    parser.add_argument('--threshold', type=float, default=REGRESSION, help="отношение времён, выше которого — регрессия")
+    parser.add_argument('--history', action='store_true', help="все сохранённые прогоны")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.history:
+        history()
+        return 0
+    results = run_all(args.select)
+    record = {
+        'commit': commit_id(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'machine': platform.node(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    # Базу сравнения читаем до сохранения — иначе сравнение с тем же коммитом бессмысленно
+    base = load(commit_id(args.compare)) if args.compare else None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        # Частичный прогон (-k) дополняет сохранённые результаты коммита
+        if os.path.exists(result_path(record['commit'])):
+            saved = load(record['commit'])
+            saved['results'].update(results)
+            record['results'] = saved['results']
+        with open(result_path(record['commit']), 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+    if base is not None:
+        head = dict(record, results=results)
+        if compare(base, head, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# Много независимых реакторов в одном процессе (по сессии на курсанта).
+# Реакторы одной зоны делят геометрию, их поля потока лежат срезами одного
+# массива (S, grid, grid), и шаг физики всех реакторов, которым пора, —
+# это один векторный шаг диффузии на всю пачку вместо S маленьких.
+# Остальное (кинетика, обратные связи) у каждого реактора своё.
+#
+#   python fleet.py --sessions 500 --seconds 600
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from metrics import MetricsExport
+from reactor import CORE_RADIUS, ROD_GRID, ReactorSim, core_geometry
+
+
+class ReactorFleet:
+    def __init__(self, count=0, grid=ROD_GRID, radius=CORE_RADIUS):
+        self.geometry = core_geometry(grid, radius)
+        self.sims = []
+        shape = (max(count, 1), grid, grid)
+        self.phi = np.zeros(shape, dtype=np.float64)
+        self.insertion = np.zeros(shape, dtype=np.float64)
+        for _ in range(count):
+            self.add()
+
+    def __len__(self):
+        return len(self.sims)
+
+    def __iter__(self):
+        return iter(self.sims)
+
+    def __getitem__(self, k):
+        return self.sims[k]
+
+    def _grow(self, capacity):
+        # Пачка растёт удвоением; поля реакторов переезжают и снова становятся срезами
+        phi = np.zeros((capacity,) + self.phi.shape[1:], dtype=np.float64)
+        insertion = np.zeros_like(phi)
+        n = len(self.sims)
+        phi[:n] = self.phi[:n]
+        insertion[:n] = self.insertion[:n]
+        self.phi, self.insertion = phi, insertion
+        for k, sim in enumerate(self.sims):
+            self._bind(sim, k)
+
+    def _bind(self, sim, k):
+        sim.flux.phi = self.phi[k]
+        sim.insertion = self.insertion[k]
+
+    def add(self):
+        # Новая сессия: отдельный реактор с общей геометрией
+        n = len(self.sims)
+        if n == len(self.phi):
+            self._grow(2 * n)
+        sim = ReactorSim(geometry=self.geometry)
+        self.phi[n] = sim.flux.phi
+        self._bind(sim, n)
+        self.sims.append(sim)
+        return sim
+
+    def remove(self, sim):
+        # Последний реактор пачки занимает место удалённого
+        k = self.sims.index(sim)
+        # Удалённый реактор забирает своё поле до того, как слот перезапишут
+        sim.flux.phi = sim.flux.phi.copy()
+        sim.insertion = sim.insertion.copy()
+        last = len(self.sims) - 1
+        if k != last:
+            moved = self.sims[last]
+            self.phi[k] = self.phi[last]
+            self.insertion[k] = self.insertion[last]
+            self.sims[k] = moved
+            self._bind(moved, k)
+        self.sims.pop()
+
+    def step(self, dt):
+        # Все реакторы на dt; каждый шаг физики — пачкой по тем, кому пора
+        sims = self.sims
+        for sim in sims:
+            sim.time += dt
+        flux = self.geometry.flux
+        while True:
+            due = [k for k, sim in enumerate(sims)
+                   if not sim.exploded and sim.time - sim.last_update >= sim.tick]
+            if not due:
+                break
+            for k in due:
+                sim = sims[k]
+                sim.last_update = round(sim.last_update + sim.tick, 9)
+                sim._begin_tick(sim.last_update)
+            ticks = {sims[k].tick for k in due}
+            if len(due) == len(sims) and len(ticks) == 1:
+                flux.advance(self.phi[:len(sims)], ticks.pop(), self.insertion[:len(sims)])
+            else:
+                # Реакторы с другой фазой или частотой шага — подпачки и обратная запись
+                for tick in ticks:
+                    group = [k for k in due if sims[k].tick == tick]
+                    phi = self.phi[group]
+                    flux.advance(phi, tick, self.insertion[group])
+                    self.phi[group] = phi
+            for k in due:
+                sims[k]._end_tick(sims[k].last_update)
+        for sim in sims:
+            sim.scheduler.run_until(sim.time)
+
+    def run(self, seconds):
+        self.step(seconds)
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Много реакторов РБМК-1000 в одном процессе")
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=600)
+    MetricsExport.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    fleet = ReactorFleet(args.sessions)
+    built = time.perf_counter() - started
+    for k, sim in enumerate(fleet):
+        # У каждого курсанта своя группа стержней
+        cells = list(zip(sim.rods.i.tolist(), sim.rods.j.tolist()))
+        for cell in cells[k % len(cells):][:4]:
+            sim.select_rod(*cell)
+        sim.raise_rods()
+    export = MetricsExport.from_args(args)
+    if export is not None:
+        for k, sim in enumerate(fleet):
+            export.watch(sim, f"s{k:04d}")
+    started = time.perf_counter()
+    fleet.run(args.seconds)
+    elapsed = time.perf_counter() - started
+    if export is not None:
+        export.close()
+    print(f"сессий: {len(fleet)}, создание: {built * 1000:.0f} мс, "
+          f"{args.seconds:.0f} с симуляции за {elapsed:.2f} с "
+          f"({elapsed / args.seconds / len(fleet) * 1e6:.1f} мкс на реактор-секунду)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Пространственное поле потока нейтронов (мощности) по каналам активной зоны.
+# Поле живёт на той же сетке, что и стержни, и эволюционирует векторным
+# 5-точечным диффузионным шаблоном:
+#
+#   dφ/dt = D·∇²φ − Σa·φ + λ·P·(b + (1 − b)(1 − h)),   Σa = λ·(1 + K·h)
+#
+# где h — глубина погружения ближайшего стержня (1 — вставлен). Вставленный
+# стержень гасит источник своего канала и усиливает поглощение, фон b держит
+# форму поля определённой и при заглушенной зоне. Амплитуду задаёт точечная
+# кинетика (СФКРЭ — это n·P_NOMINAL в ReactorSim), поле даёт только форму:
+# shape() — распределение мощности по каналам с суммой 1.
+import copy
+import math
+
+import numpy as np
+
+DIFFUSION = 0.2  # ячеек²/с
+REMOVAL = 0.5  # λ, 1/с — насколько быстро поле догоняет положение стержней
+ROD_ABSORPTION = 1.0  # K — добавочное поглощение полностью вставленного стержня
+CHANNEL_POWER = 50  # P — мощность канала с полностью извлечённым стержнем
+BACKGROUND = 0.02  # b — доля источника в канале под вставленным стержнем
+
+
+def core_importance(mask):
+    # Ценность нейтронов по зоне (приближение основной гармоники: cos² по
+    # радиусу до экстраполированной границы) — вес стержня в реактивности
+    rows, cols = mask.shape
+    i, j = np.indices(mask.shape)
+    r = np.hypot(i - rows // 2, j - cols // 2)
+    edge = r[mask].max() + 1.0
+    return np.where(mask, np.cos(0.5 * np.pi * r / edge) ** 2, 0.0)
+
+
+def nearest_rod_map(mask, rod_i, rod_j):
+    # Для каждого канала зоны — номер ближайшего стержня (каналы без стержня
+    # управляются соседним стержнем)
+    ci, cj = np.nonzero(mask)
+    rod_i = np.asarray(rod_i, dtype=np.float64)
+    rod_j = np.asarray(rod_j, dtype=np.float64)
+    nearest = np.empty(len(ci), dtype=np.int32)
+    # Считаем кусками, чтобы матрица расстояний не разрасталась на больших зонах
+    for start in range(0, len(ci), 4096):
+        di = ci[start:start + 4096, None] - rod_i[None, :]
+        dj = cj[start:start + 4096, None] - rod_j[None, :]
+        nearest[start:start + 4096] = np.argmin(di * di + dj * dj, axis=1)
+    return nearest
+
+
+class FluxField:
+    def __init__(self, mask, diffusion=DIFFUSION, removal=REMOVAL,
+                 rod_absorption=ROD_ABSORPTION, channel_power=CHANNEL_POWER,
+                 background=BACKGROUND):
+        self.mask = np.asarray(mask, dtype=bool)
+        self.diffusion = diffusion
+        self.removal = removal
+        self.rod_absorption = rod_absorption
+        self.channel_power = channel_power
+        self.background = background
+        self.phi = np.zeros(self.mask.shape, dtype=np.float64)
+        self.channels = int(np.count_nonzero(self.mask))
+        # Связи между соседними каналами: поток идёт только внутри зоны
+        self.link_x = (self.mask[:, :-1] & self.mask[:, 1:]).astype(np.float64)
+        self.link_y = (self.mask[:-1, :] & self.mask[1:, :]).astype(np.float64)
+        self._lap = np.zeros_like(self.phi)
+        self._source_mask = self.mask.astype(np.float64)
+        # Явная схема по диффузии устойчива при h·4D < 1
+        self.max_substep = 0.9 / (4 * diffusion) if diffusion > 0 else math.inf
+
+    def spawn(self):
+        # Новое поле той же зоны: геометрия общая, своё только φ
+        field = copy.copy(self)
+        field.phi = np.zeros_like(self.phi)
+        field._lap = np.zeros_like(self._lap)
+        return field
+
+    def laplacian(self, phi):
+        # phi может нести ведущую ось пачки полей одной зоны (ReactorFleet)
+        lap = self._lap if phi.shape == self._lap.shape else np.zeros_like(phi)
+        lap.fill(0)
+        fx = (phi[..., :, 1:] - phi[..., :, :-1]) * self.link_x
+        lap[..., :, :-1] += fx
+        lap[..., :, 1:] -= fx
+        fy = (phi[..., 1:, :] - phi[..., :-1, :]) * self.link_y
+        lap[..., :-1, :] += fy
+        lap[..., 1:, :] -= fy
+        return lap
+
+    def step(self, dt, insertion):
+        # insertion — глубина погружения по каналам (сетка той же формы, 0..1)
+        self.advance(self.phi, dt, insertion)
+
+    def advance(self, phi, dt, insertion):
+        # Шаг для произвольного φ на месте — одного поля или пачки (S, grid, grid)
+        withdrawal = self.background + (1.0 - self.background) * (1.0 - insertion)
+        source = self.removal * self.channel_power * withdrawal * self._source_mask
+        absorption = self.removal * (1.0 + self.rod_absorption * insertion)
+        n = max(1, math.ceil(dt / self.max_substep))
+        h = dt / n
+        for _ in range(n):
+            # Диффузия явно, поглощение неявно — устойчиво при любом K
+            phi += h * (self.diffusion * self.laplacian(phi) + source)
+            phi /= 1.0 + h * absorption
+
+    def total(self):
+        return float(self.phi.sum())
+
+    def shape(self):
+        # Нормированное распределение (сумма по зоне — 1)
+        total = self.total()
+        if total > 0:
+            return self.phi / total
+        return self._source_mask / self.channels
@@ -0,0 +1,72 @@
+# Шрифты без SysFont на старте. pygame.font.SysFont при первом вызове
+# перебирает все системные шрифты (fc-list), что на киосках занимает заметную
+# часть запуска. Найденные пути к файлам шрифтов сохраняются в кэш на диске;
+# при промахе поиск идёт в фоновом потоке, а пульт до его конца рисуется
+# встроенным шрифтом pygame.
+import json
+import os
+import threading
+
+import pygame
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'rbmk1000')
+CACHE_PATH = os.path.join(CACHE_DIR, 'fonts.json')
+
+
+class FontCache:
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.paths = {}  # "имя|жирный" -> путь к файлу или None, если шрифта нет
+        self.thread = None
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.paths = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(name, bold):
+        return f"{name}|{int(bold)}"
+
+    def missing(self, specs):
+        return [(name, bold) for name, bold in specs if name and self.key(name, bold) not in self.paths]
+
+    def resolve(self, specs):
+        # Медленная часть: перебор системных шрифтов
+        for name, bold in self.missing(specs):
+            self.paths[self.key(name, bold)] = pygame.font.match_font(name, bold=bold)
+        self.save()
+
+    def resolve_async(self, specs):
+        # Возвращает True, если пришлось запустить поиск в фоне
+        if not self.missing(specs):
+            return False
+        self.thread = threading.Thread(target=self.resolve, args=(specs,), name='font-resolve', daemon=True)
+        self.thread.start()
+        return True
+
+    def pending(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def save(self):
+        # Кэш — не критичные данные: на read-only диске просто не сохраняем
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.paths, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def font(self, name, size, bold=False):
+        # Неизвестный или отсутствующий шрифт — встроенный, жирность синтетическая
+        path = self.paths.get(self.key(name, bold)) if name else None
+        try:
+            f = pygame.font.Font(path, size)
+        except (OSError, pygame.error):
+            path = None
+            f = pygame.font.Font(None, size)
+        if bold and path is None:
+            f.set_bold(True)
+        return f
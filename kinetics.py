@@ -0,0 +1,116 @@
+# Точечная кинетика с шестью группами запаздывающих нейтронов:
+#
+#   dn/dt  = (ρ − β)/Λ · n + Σ λi·Ci + S
+#   dCi/dt = βi/Λ · n − λi·Ci
+#
+# Система жёсткая (мгновенные нейтроны против 80-секундной группы), поэтому
+# интегрируется L-устойчивым методом Розенброка ROS2 с адаптивным шагом.
+# Матрица Якоби — «стрелка», и линейная система решается за O(6) без numpy:
+# на одну секунду симуляции в стационаре уходит один шаг, на переходном
+# процессе — несколько десятков.
+import math
+
+# --- Константы U-235 ---
+BETA_I = (0.000215, 0.001424, 0.001274, 0.002568, 0.000748, 0.000273)
+LAMBDA_I = (0.0124, 0.0305, 0.111, 0.301, 1.14, 3.01)  # 1/с
+BETA = sum(BETA_I)
+GENERATION_TIME = 1e-3  # Λ, с — графитовый замедлитель
+
+SOURCE = 1e-5  # пусковой источник, доли номинала в секунду
+N_MAX = 32.0  # выше этого счётчики СФКРЭ уходят в зашкал
+
+GAMMA = 1 + 1 / math.sqrt(2)
+
+
+def source_level(rho):
+    # Установившаяся мощность подкритической зоны с источником
+    return SOURCE * GENERATION_TIME / -rho
+
+
+# βi/Λ и λi по группам — чтобы не пересчитывать в цикле
+GROUPS = tuple((b / GENERATION_TIME, l) for b, l in zip(BETA_I, LAMBDA_I))
+
+
+class PointKinetics:
+    def __init__(self, n=0.0, rtol=1e-2, atol=1e-9):
+        self.rtol = rtol
+        self.atol = atol
+        self.n = 0.0
+        self.c = [0.0] * 6
+        self.h = 0.1  # выбранный размер шага — стартовый для следующего вызова
+        self.set_power(n)
+
+    def set_power(self, n):
+        # Равновесные предшественники для мощности n
+        self.n = n
+        self.c = [bl / l * n for bl, l in GROUPS]
+
+    def _ros2(self, a, n, c, h):
+        # Один шаг ROS2; возвращает решение и оценку ошибки в норме rtol/atol.
+        # (I − γhJ)x = r для J = [[a, λ], [β/Λ, −diag λ]] решается подстановкой
+        g = GAMMA * h
+        inv_d = [1.0 / (1.0 + g * l) for _, l in GROUPS]
+        den = 1.0 - g * a - g * g * sum(l * bl * q for (bl, l), q in zip(GROUPS, inv_d))
+        gbl = [g * bl for bl, _ in GROUPS]
+        gl = [g * l for _, l in GROUPS]
+
+        # Стадия 1: f(y)
+        r0 = a * n + SOURCE
+        r = []
+        for (bl, l), ci in zip(GROUPS, c):
+            r0 += l * ci
+            r.append(bl * n - l * ci)
+        k1 = (r0 + sum(x * ri * q for x, ri, q in zip(gl, r, inv_d))) / den
+        k1c = [(ri + x * k1) * q for ri, x, q in zip(r, gbl, inv_d)]
+
+        # Стадия 2: f(y + h·k1) − 2·k1
+        n1 = n + h * k1
+        r0 = a * n1 + SOURCE - 2.0 * k1
+        r = []
+        for (bl, l), ci, k in zip(GROUPS, c, k1c):
+            ci1 = ci + h * k
+            r0 += l * ci1
+            r.append(bl * n1 - l * ci1 - 2.0 * k)
+        k2 = (r0 + sum(x * ri * q for x, ri, q in zip(gl, r, inv_d))) / den
+        k2c = [(ri + x * k2) * q for ri, x, q in zip(r, gbl, inv_d)]
+
+        # Решение второго порядка и ошибка относительно вложенной схемы первого;
+        # оценку пропускаем через (I − γhJ)⁻¹, чтобы жёсткая мгновенная мода
+        # не дробила шаг зря (фильтр Шампайна)
+        e0 = 0.5 * h * (k1 + k2)
+        ec = [0.5 * h * (e1 + e2) for e1, e2 in zip(k1c, k2c)]
+        e0 = (e0 + sum(x * ri * q for x, ri, q in zip(gl, ec, inv_d))) / den
+        rtol, atol = self.rtol, self.atol
+        new_n = n + h * (1.5 * k1 + 0.5 * k2)
+        err = (e0 / (atol + rtol * abs(n))) ** 2
+        new_c = []
+        for ci, e1, e2, ei, x, q in zip(c, k1c, k2c, ec, gbl, inv_d):
+            new_c.append(ci + h * (1.5 * e1 + 0.5 * e2))
+            err += ((ei + x * e0) * q / (atol + rtol * abs(ci))) ** 2
+        return new_n, new_c, math.sqrt(err / 7)
+
+    def advance(self, dt, rho):
+        # Продвигает кинетику на dt при постоянной на этом отрезке реактивности
+        a = (rho - BETA) / GENERATION_TIME
+        n, c = self.n, self.c
+        h = self.h
+        t = 0.0
+        while t < dt:
+            step = min(h, dt - t)
+            new_n, new_c, err = self._ros2(a, n, c, step)
+            factor = min(4.0, max(0.2, 0.9 / math.sqrt(err))) if err > 0 else 4.0
+            if err > 1.0:
+                h = step * factor
+                continue
+            t += step
+            n = max(0.0, new_n)
+            c = [max(0.0, ci) for ci in new_c]
+            # Укороченный до конца интервала шаг не сбрасывает выбранный размер
+            if step == h or factor < 1.0:
+                h = step * factor
+            if n >= N_MAX:
+                # Зашкал: разгон на мгновенных нейтронах, дальше решает тепловая часть
+                n = N_MAX
+                break
+        self.n, self.c, self.h = n, c, h
+        return n
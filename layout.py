@@ -0,0 +1,39 @@
+# Раскладка пульта, не зависящая от разрешения. Координаты виджетов заданы
+# в единицах эскиза 1000x700; окно любого размера получает один масштаб по
+# меньшей стороне и поля по краям, так что пропорции пульта одинаковы от
+# ноутбука до 4K-экрана щита управления. Масштаб применяется при раскладке:
+# прямоугольники, шрифты и заготовки сразу строятся в пикселях окна, кадр
+# рисуется без масштабирования поверхностей. При масштабе 1 пиксели те же,
+# что в эскизе.
+import pygame
+
+DESIGN_SIZE = (1000, 700)
+
+
+class Layout:
+    def __init__(self, size, design=DESIGN_SIZE):
+        self.size = tuple(size)
+        self.design = design
+        self.scale = min(size[0] / design[0], size[1] / design[1])
+        self.offset = ((size[0] - round(design[0] * self.scale)) // 2,
+                       (size[1] - round(design[1] * self.scale)) // 2)
+
+    def px(self, v):
+        # Длина в пикселях; рамка или радиус не пропадают при уменьшении
+        return max(1, round(v * self.scale)) if v > 0 else 0
+
+    def point(self, x, y):
+        return self.offset[0] + round(x * self.scale), self.offset[1] + round(y * self.scale)
+
+    def rect(self, x, y, w, h):
+        return pygame.Rect(self.point(x, y), (self.px(w), self.px(h)))
+
+    def grid(self, center, span, cells, gap):
+        # Квадратная сетка cells x cells в области span эскиза: шаг — целые
+        # пиксели, чтобы все клетки были одного размера и брались из одной
+        # заготовки; gap — зазор между клетками в долях шага.
+        # Возвращает левый верхний угол клетки (0, 0), шаг и размер клетки
+        pitch = max(2, self.px(span) // cells)
+        size = pitch - max(1, round(gap * pitch))
+        cx, cy = self.point(*center)
+        return (cx - cells // 2 * pitch, cy - cells // 2 * pitch), pitch, size
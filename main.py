@@ -1,15 +1,34 @@
+import argparse
 import pygame
 import sys
-import time
 import math
 
+import numpy as np
+
+from reactor import CORE_RADIUS, ReactorSim, ROD_GRID, substep_rate
+from audio import AudioManager, NullBackend, PygameBackend
+from fonts import FontCache
+from layout import DESIGN_SIZE, Layout
+from profiling import FrameProfiler, SamplingProfiler
+from render import DirtyRenderer, TileAtlas, TileLayer, TextCache
+from rods import INSERTED, RAISING, RAISED, LOWERING, RBMK_GRID, RBMK_RADIUS
+from metrics import MetricsExport
+from snapshot import Timeline
+from telemetry import Recorder, Replay
+
 # --- Настройки ---
-WIDTH, HEIGHT = 1000, 700
+# Координаты пульта — в единицах эскиза 1000x700 (см. layout.py), окно — любое
+WIDTH, HEIGHT = DESIGN_SIZE
 ZONE_CENTER = (350, 350)
-ZONE_RADIUS = 180
 ROD_SIZE = 38
-ROD_GRID = 9  # 9x9 сетка, но не все стержни будут активны
-ROD_TOTAL = 0  # будет посчитано
+ROD_PITCH = ROD_SIZE + 4  # шаг сетки стержней на эскизе
+ZONE_SPAN = ROD_GRID * ROD_PITCH  # сторона квадрата зоны на эскизе; большая зона делит его мельче
+ROD_GAP = (ROD_PITCH - ROD_SIZE) / ROD_PITCH  # зазор между стержнями в долях шага
+# Зоны на выбор: учебная 9x9 и полноразмерная РБМК 49x49 (см. rods.py)
+CORES = {
+    'small': (ROD_GRID, CORE_RADIUS),
+    'rbmk': (RBMK_GRID, RBMK_RADIUS),
+}
 
 # --- Цвета ---
 WHITE = (255, 255, 255)
@@ -27,97 +46,183 @@ LAMP_DIGIT = (255, 180, 60)
 BUTTON_FACE = (180, 180, 200)
 BUTTON_SHADOW = (100, 100, 120)
 BUTTON_HIGHLIGHT = (220, 220, 255)
+PANEL_BG = (60, 80, 100)
+PAPER = (245, 242, 225)
+PAPER_EDGE = (200, 200, 200)
+PAPER_INK = (60, 40, 10)
+
+LAMP_POS = (60, 580)
+INFO_RECT = (700, 45, 300, 122)
+PROFILE_RECT = (700, 520, 296, 176)
+PROFILE_REFRESH = 15  # кадров между обновлениями оверлея профилировщика
+PHYSICS_RATE = 20  # Гц — шагов физики в секунду симуляции по умолчанию
+TIME_SCALES = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)  # сжатие времени, +/- на клавиатуре
+MAX_FRAME_DT = 0.25  # с — после зависания окна симуляция не догоняет лавиной шагов
+
+# --- Pygame (инициализируется в main()) ---
+screen = None
+font = None
+font_lamp = None
+font_small = None
+font_cache = None
+
+# Раскладка под текущий размер окна; до init_pygame() — масштаб 1
+layout = Layout(DESIGN_SIZE)
+rod_origin = (0, 0)  # левый верхний угол ячейки (0, 0), пиксели окна
+rod_pitch = ROD_PITCH
+rod_size = ROD_SIZE
+rod_rects = []  # прямоугольники по номеру стержня
+
+# Шрифты пульта: (имя системного шрифта, размер на эскизе, жирный)
+FONTS = {
+    'font': (None, 24, False),
+    'font_lamp': ("consolas", 64, True),
+    'font_small': ("consolas", 15, False),
+}
+
+# Весь текст пульта рисуется через кэш
+text_cache = TextCache()
+
+# --- Звук: очередь событий и отдельный поток (см. audio.py) ---
+audio = AudioManager()
+
+# --- Реактор ---
+sim = ReactorSim(ROD_GRID)
+
+# --- Профилирование кадра (оверлей по F3) ---
+profiler = FrameProfiler()
+show_profile = False
+
+# --- Ход времени: сжатие и частота физики ---
+time_scale = 1
+physics_rate = PHYSICS_RATE
+
+
+def init_pygame(size=DESIGN_SIZE, fullscreen=False):
+    # Только то, что нужно для первого кадра: окно и шрифты по кэшу путей.
+    # Без pygame.init() — он поднял бы и звук, и джойстики
+    global screen, font_cache
+    pygame.display.init()
+    pygame.font.init()
+    # Полный экран — в разрешении дисплея, окно можно растягивать
+    screen = pygame.display.set_mode((0, 0) if fullscreen else size,
+                                     pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE)
+    pygame.display.set_caption("РБМК-1000 Simulator")
+    font_cache = FontCache()
+    # Промах кэша: системные шрифты ищутся фоном, пока — встроенный шрифт
+    font_cache.resolve_async([(name, bold) for name, _, bold in FONTS.values()])
+    set_layout(screen.get_size())
+    load_fonts()
+
+
+def load_fonts():
+    global font, font_lamp, font_small
+    font = font_cache.font(FONTS['font'][0], layout.px(FONTS['font'][1]), FONTS['font'][2])
+    font_lamp = font_cache.font(FONTS['font_lamp'][0], layout.px(FONTS['font_lamp'][1]), FONTS['font_lamp'][2])
+    font_small = font_cache.font(FONTS['font_small'][0], layout.px(FONTS['font_small'][1]), FONTS['font_small'][2])
+    # Отрисованный старыми шрифтами текст больше не нужен
+    text_cache.clear()
+
+
+def set_layout(size):
+    # Пиксельная геометрия пульта под размер окна; состояние виджетов не трогается.
+    # Шрифты и заготовки после этого пересоздаются (load_fonts, build_renderer)
+    global layout, rod_origin, rod_pitch, rod_size, rod_rects
+    layout = Layout(size)
+    rod_origin, rod_pitch, rod_size = layout.grid(ZONE_CENTER, ZONE_SPAN, sim.rods.grid, ROD_GAP)
+    # Прямоугольники по номеру стержня: считаются один раз на раскладку
+    rod_rects = [rod_rect(i, j) for i, j in zip(sim.rods.i.tolist(), sim.rods.j.tolist())]
+    for b in buttons:
+        b.place()
+    az5_btn.place()
+    muf_switch.place()
+
+
+def rod_rect(i, j):
+    x = rod_origin[0] + j * rod_pitch
+    y = rod_origin[1] + i * rod_pitch
+    return pygame.Rect(x, y, rod_size, rod_size)
+
+
+def cell_at(pos):
+    # Попадание мышью за O(1): ячейка по шагу сетки, зазор между стержнями
+    # и клетки вне круга зоны (в индексе стержней -1) — мимо
+    i, dy = divmod(pos[1] - rod_origin[1], rod_pitch)
+    j, dx = divmod(pos[0] - rod_origin[0], rod_pitch)
+    if dx >= rod_size or dy >= rod_size or sim.rods.find(i, j) < 0:
+        return None
+    return i, j
+
+
+def select_area(a, b):
+    # Выбор протягиванием: все стержни прямоугольника a-b, уже выбранные не трогаем,
+    # чтобы в журнал действий попадали только настоящие выборы
+    rods = sim.rods
+    for i in range(min(a[0], b[0]), max(a[0], b[0]) + 1):
+        for j in range(min(a[1], b[1]), max(a[1], b[1]) + 1):
+            k = rods.find(i, j)
+            if k >= 0 and not rods.selected[k]:
+                sim.select_rod(i, j)
+
+
+def render_text(f, text, color):
+    return text_cache.render(f, text, color)
+
+
+def draw_paper(surf, text, center):
+    # Бумажка с надписью
+    txt = render_text(font, text, PAPER_INK)
+    txt_rect = txt.get_rect(center=center)
+    paper_pad_x = layout.px(8)
+    paper_pad_y = layout.px(4)
+    paper_rect = pygame.Rect(
+        txt_rect.left - paper_pad_x,
+        txt_rect.top - paper_pad_y,
+        txt_rect.width + 2 * paper_pad_x,
+        txt_rect.height + 2 * paper_pad_y
+    )
+    pygame.draw.rect(surf, PAPER, paper_rect, border_radius=layout.px(8))
+    pygame.draw.rect(surf, PAPER_EDGE, paper_rect, layout.px(2), border_radius=layout.px(8))
+    surf.blit(txt, txt_rect)
+
 
-# --- Pygame init ---
-pygame.init()
-pygame.mixer.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("РБМК-1000 Simulator")
-font = pygame.font.SysFont(None, 24)
-font_mono = pygame.font.SysFont("consolas", 48, bold=True)
-font_lamp = pygame.font.SysFont("consolas", 64, bold=True)
-
-# --- Звуки ---
-az5_alarm_sound = pygame.mixer.Sound("sounds/alarm-az-5fast.ogg")
-explosive_alarm_sound = pygame.mixer.Sound("sounds/alarm-explosive.ogg")
-saor_alarm_sound = pygame.mixer.Sound("sounds/alarm-saor.ogg")
-az5_alarm_channel = None
-explosive_alarm_played = False
-
-# --- Реакторные параметры ---
-temperature = 20
-sfkre = 0
-last_update = time.time()
-last_saor_time = 0
-auto_protection_enabled = True
-cooling_mode = 'normal'
-exploded = False
-last_az5_time = -10  # чтобы сразу можно было нажать
-
-# --- Для механики прироста температуры от СФКРЭ ---
-sfkre_temp_accum = 0
-
-# --- Стержни ---
-rods = []
-rod_selected = []
-
-# --- Глобальные переменные для АЗ-5 ---
-az5_decay_active = False
-az5_decay_target = 0
-
-# --- Глобальные переменные для ключа питания муфт ---
-muf_switch_active = False
-muf_switch_decay_target = 0
-muf_switch_last_time = 0
-
-class Rod:
-    def __init__(self, i, j, x, y):
-        self.i = i
-        self.j = j
-        self.x = x
-        self.y = y
-        self.inserted = True
-        self.raising = False
-        self.raising_start_time = None
-        self.fully_raised = False
-        self.lowering = False
-        self.lowering_start_time = None
-
-    def rect(self):
-        return pygame.Rect(self.x, self.y, ROD_SIZE, ROD_SIZE)
-
-# --- Генерация скруглённой зоны ---
-for i in range(ROD_GRID):
-    for j in range(ROD_GRID):
-        # Центр квадрата
-        x = ZONE_CENTER[0] + (j - ROD_GRID // 2) * (ROD_SIZE + 4)
-        y = ZONE_CENTER[1] + (i - ROD_GRID // 2) * (ROD_SIZE + 4)
-        # Проверка, попадает ли в круг
-        if (x - ZONE_CENTER[0]) ** 2 + (y - ZONE_CENTER[1]) ** 2 <= ZONE_RADIUS ** 2:
-            rods.append(Rod(i, j, x, y))
-ROD_TOTAL = len(rods)
+def play_sim_sounds():
+    # События движка уходят в очередь звука — микшер здесь не вызывается
+    audio.post_events(sim.pop_events())
 
 # --- Кнопки ---
 class Button:
     def __init__(self, x, y, w, h, text, color, callback):
-        self.rect = pygame.Rect(x, y, w, h)
+        self.frame = (x, y, w, h)  # на эскизе
         self.text = text
         self.color = color
         self.callback = callback
         self.hovered = False
-
-    def draw(self):
-        # Тень
-        shadow_rect = self.rect.move(4, 4)
-        pygame.draw.rect(screen, BUTTON_SHADOW, shadow_rect, border_radius=10)
-        # Лицевая часть
-        face_color = BUTTON_HIGHLIGHT if self.hovered else self.color
-        pygame.draw.rect(screen, face_color, self.rect, border_radius=10)
-        pygame.draw.rect(screen, BLACK, self.rect, 2, border_radius=10)
-        # Текст
-        txt = font.render(self.text, True, BLACK)
-        txt_rect = txt.get_rect(center=self.rect.center)
-        screen.blit(txt, txt_rect)
+        self.faces = {}
+        self.place()
+
+    def place(self):
+        self.rect = layout.rect(*self.frame)
+
+    def prerender(self):
+        # Лицевая часть в обычном и подсвеченном виде, с текстом
+        for hovered in (False, True):
+            face = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            face_rect = face.get_rect()
+            face_color = BUTTON_HIGHLIGHT if hovered else self.color
+            pygame.draw.rect(face, face_color, face_rect, border_radius=layout.px(10))
+            pygame.draw.rect(face, BLACK, face_rect, layout.px(2), border_radius=layout.px(10))
+            txt = render_text(font, self.text, BLACK)
+            face.blit(txt, txt.get_rect(center=face_rect.center))
+            self.faces[hovered] = face
+
+    def draw_shadow(self, surf):
+        # Тень статична и рисуется в фон
+        shadow_rect = self.rect.move(layout.px(4), layout.px(4))
+        pygame.draw.rect(surf, BUTTON_SHADOW, shadow_rect, border_radius=layout.px(10))
+
+    def draw(self, surf):
+        surf.blit(self.faces[self.hovered], self.rect)
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
@@ -127,292 +232,102 @@ class Button:
 
 buttons = []
 
-# --- AZ-5 логика ---
-az5_triggered = False
-az5_cooldown = 0
-
-def az5_action():
-    global sfkre, temperature, az5_triggered, az5_cooldown, last_az5_time, az5_decay_active, az5_decay_target, exploded, az5_alarm_channel
-    if exploded:
-        return
-    now = time.time()
-    if now - last_az5_time < 5:
-        return
-    last_az5_time = now
-    for rod in rods:
-        rod.inserted = True
-        rod.raising = False
-        rod.raising_start_time = None
-        rod.fully_raised = False
-        rod.lowering = False
-        rod.lowering_start_time = None
-    if sfkre > 0:
-        sfkre += 100
-    temperature += 50
-    az5_decay_active = True
-    az5_decay_target = 0  # Можно сделать 0 или другой минимум
-    # Воспроизвести звук АЗ-5
-    if az5_alarm_channel is None or not az5_alarm_channel.get_busy():
-        az5_alarm_channel = az5_alarm_sound.play(loops=-1)
-
-def saor_action():
-    global temperature, last_saor_time, exploded
-    if exploded:
-        return
-    if time.time() - last_saor_time >= 60:
-        temperature = max(20, temperature - 300)
-        last_saor_time = time.time()
-        # Воспроизвести звук САОР
-        saor_alarm_sound.play()
-
-def update_reactor():
-    global sfkre, temperature, exploded, last_update, az5_triggered, az5_cooldown, az5_decay_active, az5_decay_target
-    global muf_switch_active, muf_switch_decay_target
-    global sfkre_temp_accum
-    global az5_alarm_channel, explosive_alarm_played
-
-    now = time.time()
-    if now - last_update >= 1:
-        last_update = now
-
-        # Поднимающиеся стержни
-        for rod in rods:
-            if rod.raising and not rod.fully_raised:
-                sfkre += 10
-                if sfkre < 0:
-                    sfkre = 0
-
-        # Опускающиеся стержни
-        for rod in rods:
-            if rod.lowering:
-                sfkre -= 10
-                if sfkre < 0:
-                    sfkre = 0
-
-        # --- Плавное снижение СФКРЭ после АЗ-5 ---
-        if az5_decay_active:
-            if sfkre > az5_decay_target and sfkre > 0:
-                sfkre -= 50
-                if sfkre < az5_decay_target:
-                    sfkre = az5_decay_target
-            else:
-                az5_decay_active = False
-
-        # --- Плавное снижение СФКРЭ после MUF SWITCH ---
-        if muf_switch_active:
-            if sfkre > muf_switch_decay_target and sfkre > 0:
-                sfkre -= 100  # Быстрее, чем у АЗ-5
-                if sfkre < muf_switch_decay_target:
-                    sfkre = muf_switch_decay_target
-            else:
-                muf_switch_active = False
-
-        # --- Механика: каждые +25 к СФКРЭ дают +5 к температуре ---
-        sfkre_delta = sfkre - sfkre_temp_accum
-        if sfkre_delta > 0:
-            add_temp = (sfkre_delta // 25) * 5
-            if add_temp > 0:
-                temperature += add_temp
-                sfkre_temp_accum += (sfkre_delta // 25) * 25
-        elif sfkre_delta < 0:
-            # Если СФКРЭ уменьшилось, корректируем накопитель
-            sfkre_temp_accum = sfkre
-
-        # Завершение поднятия
-        for rod in rods:
-            if rod.raising and not rod.fully_raised:
-                if now - rod.raising_start_time >= 5:
-                    rod.raising = False
-                    rod.fully_raised = True
-                    rod.inserted = False
-
-        # Завершение опускания
-        for rod in rods:
-            if rod.lowering:
-                if now - rod.lowering_start_time >= 5:
-                    rod.lowering = False
-                    rod.fully_raised = False
-                    rod.inserted = True
-
-        # Температура стремится к мощности
-        modifier = 1.0
-        if cooling_mode == 'low':
-            modifier = 1.2
-        elif cooling_mode == 'high':
-            modifier = 0.7
-
-        target_temp = int(sfkre / 25) * 5 * modifier
-        if temperature < target_temp:
-            temperature += min(10, target_temp - temperature)
-        elif temperature > target_temp:
-            temperature -= min(10, temperature - target_temp)
-        if temperature < 20:
-            temperature = 20
-
-        if auto_protection_enabled and temperature >= 900:
-            az5_action()
-
-        if temperature >= 1300 and not exploded:
-            exploded = True
-            # Воспроизвести звук взрыва
-            if not explosive_alarm_played:
-                explosive_alarm_sound.play()
-                explosive_alarm_played = True
-            # Остановить звук АЗ-5 после взрыва
-            if az5_alarm_channel is not None:
-                az5_alarm_channel.stop()
-                az5_alarm_channel = None
-            # Остановить все остальные звуки, кроме взрыва
-            # (не вызываем pygame.mixer.stop(), чтобы не прервать звук взрыва)
-
-        # Остановить звук АЗ-5, если СФКРЭ упал до 0 или произошёл взрыв
-        if az5_alarm_channel is not None and (sfkre <= 0 or exploded):
-            az5_alarm_channel.stop()
-            az5_alarm_channel = None
-
-def draw_lamp_counter(x, y, value):
+def draw_lamp_frame(surf, x, y):
     # Бумажка над счётчиком
-    label_text = 'Мощность СФКРЭ'
-    txt = font.render(label_text, True, (60, 40, 10))
-    txt_rect = txt.get_rect(center=(x + 110, y - 18))
-    paper_pad_x = 8
-    paper_pad_y = 4
-    paper_rect = pygame.Rect(
-        txt_rect.left - paper_pad_x,
-        txt_rect.top - paper_pad_y,
-        txt_rect.width + 2 * paper_pad_x,
-        txt_rect.height + 2 * paper_pad_y
-    )
-    pygame.draw.rect(screen, (245, 242, 225), paper_rect, border_radius=8)
-    pygame.draw.rect(screen, (200, 200, 200), paper_rect, 2, border_radius=8)
-    screen.blit(txt, txt_rect)
+    draw_paper(surf, 'Мощность СФКРЭ', layout.point(x + 110, y - 18))
     # Ламповый фон
-    lamp_rect = pygame.Rect(x, y, 220, 90)
-    pygame.draw.rect(screen, LAMP_BG, lamp_rect, border_radius=18)
-    pygame.draw.rect(screen, (80, 60, 30), lamp_rect, 4, border_radius=18)
+    lamp_rect = layout.rect(x, y, 220, 90)
+    pygame.draw.rect(surf, LAMP_BG, lamp_rect, border_radius=layout.px(18))
+    pygame.draw.rect(surf, (80, 60, 30), lamp_rect, layout.px(4), border_radius=layout.px(18))
+
+def lamp_digits_rect(x, y):
+    return layout.rect(x + 10, y + 8, 200, 74)
+
+def draw_lamp_digits(surf, x, y, value):
     # Цифры по центру
     str_val = str(int(value)).rjust(5, "0")
-    total_width = len(str_val) * 36
-    start_x = x + (220 - total_width) // 2
+    lamp_rect = layout.rect(x, y, 220, 90)
+    step = layout.px(36)
+    start_x = lamp_rect.x + (lamp_rect.w - len(str_val) * step) // 2
     # Центрируем по вертикали, чуть ниже центра (но меньше чем раньше)
     digit_height = font_lamp.get_height()
-    start_y = y + (90 - digit_height) // 2 + 4
+    start_y = lamp_rect.y + (lamp_rect.h - digit_height) // 2 + layout.px(4)
     for i, ch in enumerate(str_val):
-        digit_surf = font_lamp.render(ch, True, LAMP_DIGIT)
-        screen.blit(digit_surf, (start_x + i*36, start_y))
-    # (Надпись СФКРЭ убрана)
-
-def draw_rods():
-    for rod in rods:
-        if rod.fully_raised:
-            color = RED
-        elif rod.raising:
-            color = ORANGE
-        elif rod.lowering:
-            color = BLUE
-        elif not rod.inserted:
-            color = BLUE
-        else:
-            color = GREEN
-        if (rod.i, rod.j) in rod_selected:
-            color = YELLOW
-        pygame.draw.rect(screen, color, rod.rect(), border_radius=8)
-        pygame.draw.rect(screen, BLACK, rod.rect(), 2, border_radius=8)
-
-def draw_info():
-    t_text = font.render(f"Температура: {temperature}°C", True, BLACK)
-    ap_text = font.render(f"АПЗ: {'вкл' if auto_protection_enabled else 'выкл'}", True, BLACK)
-    screen.blit(t_text, (700, 50))
-    screen.blit(ap_text, (700, 80))
-    if exploded:
-        boom = font.render("💥 ВЗРЫВ РЕАКТОРА 💥", True, RED)
-        screen.blit(boom, (700, 150))
-
-# --- Коллбэки кнопок ---
-
-def select_rod_callback(i, j):
-    if exploded:
-        return
-    if len(rod_selected) < 4 and (i, j) not in rod_selected:
-        rod_selected.append((i, j))
-
-def reset_selection():
-    if exploded:
-        return
-    rod_selected.clear()
-
-def raise_rods():
-    if exploded:
+        surf.blit(render_text(font_lamp, ch, LAMP_DIGIT), (start_x + i*step, start_y))
+
+def draw_lamp_counter(surf, x, y, value):
+    draw_lamp_frame(surf, x, y)
+    draw_lamp_digits(surf, x, y, value)
+
+# Цвет по состоянию; опускающийся стержень ещё числится поднятым
+ROD_COLORS = {
+    INSERTED: GREEN,
+    RAISING: ORANGE,
+    RAISED: RED,
+    LOWERING: RED,
+}
+
+REPLAY_SEEK = 10  # секунд симуляции на нажатие стрелки при перемотке
+
+SELECTED = 4  # код выделенного стержня поверх состояний
+
+def rod_codes():
+    return np.where(sim.rods.selected, SELECTED, sim.rods.state)
+
+def make_rod_tiles():
+    # Скругление и рамка — в пропорции к клетке: на полной зоне клетки мелкие
+    radius = round(8 * rod_size / ROD_SIZE)
+    border = max(1, round(2 * rod_size / ROD_SIZE))
+    tiles = {}
+    for code, color in list(ROD_COLORS.items()) + [(SELECTED, YELLOW)]:
+        tile = pygame.Surface((rod_size, rod_size), pygame.SRCALPHA)
+        pygame.draw.rect(tile, color, tile.get_rect(), border_radius=radius)
+        pygame.draw.rect(tile, BLACK, tile.get_rect(), border, border_radius=radius)
+        tiles[code] = tile
+    return tiles
+
+def make_rod_atlas():
+    # Стержни стоят на чистой панели — заготовки сразу наложены на её цвет
+    return TileAtlas(make_rod_tiles(), PANEL_BG)
+
+def draw_rods(surf, atlas):
+    surf.blits(atlas.batch(rod_rects, rod_codes().tolist()), doreturn=False)
+
+def info_state():
+    return int(sim.shown_temperature()), sim.auto_protection_enabled, sim.exploded, time_scale, sim.tick
+
+def draw_info(surf):
+    t_text = render_text(font, f"Температура: {int(sim.shown_temperature())}°C", BLACK)
+    ap_text = render_text(font, f"АПЗ: {'вкл' if sim.auto_protection_enabled else 'выкл'}", BLACK)
+    time_text = render_text(font, f"Время: ×{time_scale}, физика {round(1 / sim.tick)} Гц", BLACK)
+    surf.blit(t_text, layout.point(700, 50))
+    surf.blit(ap_text, layout.point(700, 80))
+    surf.blit(time_text, layout.point(700, 110))
+    if sim.exploded:
+        boom = render_text(font, "💥 ВЗРЫВ РЕАКТОРА 💥", RED)
+        surf.blit(boom, layout.point(700, 150))
+
+def profile_state():
+    return show_profile and profiler.frames // PROFILE_REFRESH
+
+def draw_profile(surf):
+    # Оверлей профилировщика; текст меняется каждый раз, поэтому мимо кэша
+    if not show_profile:
         return
-    now = time.time()
-    for rod in rods:
-        if (rod.i, rod.j) in rod_selected and rod.inserted and not rod.fully_raised and not rod.raising and not rod.lowering:
-            rod.raising = True
-            rod.raising_start_time = now
-
-def lower_rods():
-    if exploded:
-        return
-    now = time.time()
-    for rod in rods:
-        if (rod.i, rod.j) in rod_selected and (not rod.inserted or rod.fully_raised) and not rod.lowering and not rod.raising:
-            rod.lowering = True
-            rod.lowering_start_time = now
-
-def toggle_cooling_low():
-    global cooling_mode, temperature, sfkre, exploded
-    if exploded:
-        return
-    cooling_mode = 'low'
-    # Меньше воды — температура растёт только если есть мощность, СФКРЭ растёт только если оно больше 0
-    if sfkre > 0:
-        temperature = min(temperature + 100, 2000)
-        sfkre = min(sfkre + 10, 99999)
-
-def toggle_cooling_high():
-    global cooling_mode, temperature, sfkre, exploded
-    if exploded:
-        return
-    cooling_mode = 'high'
-    # Больше воды — температура и СФКРЭ падают
-    temperature = max(temperature - 100, 0)
-    sfkre = max(sfkre - 10, 0)
-
-def toggle_auto_protect():
-    global auto_protection_enabled, exploded
-    if exploded:
-        return
-    auto_protection_enabled = not auto_protection_enabled
-
-# --- MUF SWITCH логика ---
-def muf_switch_action():
-    global sfkre, temperature, muf_switch_active, muf_switch_decay_target, muf_switch_last_time, exploded
-    if exploded:
-        return
-    now = time.time()
-    if now - muf_switch_last_time < 2:  # Быстрее, чем АЗ-5
-        return
-    muf_switch_last_time = now
-    for rod in rods:
-        rod.inserted = True
-        rod.raising = False
-        rod.raising_start_time = None
-        rod.fully_raised = False
-        rod.lowering = False
-        rod.lowering_start_time = None
-    if sfkre > 0:
-        sfkre += 50  # Можно сделать меньше, чем у АЗ-5
-    temperature += 20
-    muf_switch_active = True
-    muf_switch_decay_target = 0
+    rect = layout.rect(*PROFILE_RECT)
+    panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    stats = text_cache.stats()
+    lines = profiler.lines() + [f"кэш текста: {stats['hits']} / {stats['misses']}"]
+    line_height = layout.px(15)
+    for k, line in enumerate(lines[:rect.height // line_height]):
+        panel.blit(font_small.render(line, True, (200, 255, 200)), (layout.px(6), layout.px(3) + k * line_height))
+    surf.blit(panel, rect)
 
 # --- Переключатель Ключ питания муфт ---
 class ToggleSwitch:
     def __init__(self, x, y, w, h, label, callback):
-        self.x = x
-        self.y = y
-        self.w = w
-        self.h = h
+        self.frame = (x, y, w, h)  # на эскизе
         self.label = label
         self.callback = callback
         self.state = False
@@ -421,42 +336,52 @@ class ToggleSwitch:
         self.target_angle = 270
         self.animating = False
         self.anim_speed = 8  # скорость анимации (градусов за кадр)
+        self.knobs = {}  # угол -> готовая ручка
+        self.place()
+
+    def place(self):
+        x, y, w, h = self.frame
+        self.x, self.y = layout.point(x, y)
+        self.w = layout.px(w)
+        self.h = layout.px(h)
+        self.knobs.clear()
 
-    def draw(self):
+    def draw_base(self, surf):
         # Крепление (чёрный квадрат, чуть меньше всей области, по центру)
         base_size = int(self.h * 1.1)
         base_rect = pygame.Rect(self.x + self.w // 2 - base_size // 2, self.y + self.h // 2 - base_size // 2, base_size, base_size)
-        pygame.draw.rect(screen, (20, 20, 20), base_rect, border_radius=10)
-        # Бумажный фон под надписью
-        label_text = 'Питан. муфт'
-        txt = font.render(label_text, True, (60, 40, 10))
+        pygame.draw.rect(surf, (20, 20, 20), base_rect, border_radius=layout.px(10))
         # Бумажка и текст чуть выше центра переключателя
-        txt_rect = txt.get_rect(center=(self.x + self.w // 2, self.y - 24))
-        paper_pad_x = 8
-        paper_pad_y = 4
-        paper_rect = pygame.Rect(
-            txt_rect.left - paper_pad_x,
-            txt_rect.top - paper_pad_y,
-            txt_rect.width + 2 * paper_pad_x,
-            txt_rect.height + 2 * paper_pad_y
-        )
-        pygame.draw.rect(screen, (245, 242, 225), paper_rect, border_radius=8)
-        pygame.draw.rect(screen, (200, 200, 200), paper_rect, 2, border_radius=8)
-        screen.blit(txt, txt_rect)
-        # Круглый переключатель
-        knob_center = (self.x + self.w // 2, self.y + self.h // 2)
-        knob_radius = self.h // 2 - 4
-        pygame.draw.circle(screen, (80, 80, 80), knob_center, knob_radius+4)
-        pygame.draw.circle(screen, (30, 30, 30), knob_center, knob_radius)
-        pygame.draw.circle(screen, (0, 0, 0), knob_center, knob_radius, 2)
-        angle = self.anim_angle
+        draw_paper(surf, self.label, (self.x + self.w // 2, self.y - layout.px(24)))
+
+    def knob_rect(self):
+        knob_radius = self.h // 2
+        return pygame.Rect(self.x + self.w // 2 - knob_radius, self.y, 2 * knob_radius, 2 * knob_radius)
+
+    def render_knob(self, angle):
+        # Круглый переключатель в положении angle, координаты — внутри knob_rect()
+        rect = self.knob_rect()
+        knob = pygame.Surface(rect.size, pygame.SRCALPHA)
+        knob_center = (self.x + self.w // 2 - rect.x, self.y + self.h // 2 - rect.y)
+        knob_radius = self.h // 2 - layout.px(4)
+        pygame.draw.circle(knob, (80, 80, 80), knob_center, knob_radius + layout.px(4))
+        pygame.draw.circle(knob, (30, 30, 30), knob_center, knob_radius)
+        pygame.draw.circle(knob, (0, 0, 0), knob_center, knob_radius, layout.px(2))
         line_len = knob_radius * 0.85
         x1 = int(knob_center[0] + line_len * math.cos(math.radians(angle)))
         y1 = int(knob_center[1] + line_len * math.sin(math.radians(angle)))
         x2 = int(knob_center[0] - line_len * math.cos(math.radians(angle)))
         y2 = int(knob_center[1] - line_len * math.sin(math.radians(angle)))
-        pygame.draw.line(screen, (0, 0, 0), (x1, y1), (x2, y2), 6)
-        pygame.draw.circle(screen, (100, 100, 100), knob_center, 6)
+        pygame.draw.line(knob, (0, 0, 0), (x1, y1), (x2, y2), layout.px(6))
+        pygame.draw.circle(knob, (100, 100, 100), knob_center, layout.px(6))
+        return knob
+
+    def draw(self, surf):
+        # Положений ручки за анимацию с десяток — каждое рисуется один раз
+        knob = self.knobs.get(self.anim_angle)
+        if knob is None:
+            knob = self.knobs[self.anim_angle] = self.render_knob(self.anim_angle)
+        surf.blit(knob, self.knob_rect())
 
     def update(self):
         # Анимация поворота
@@ -486,23 +411,27 @@ class ToggleSwitch:
             self.last_state = self.state
 
 # --- Создание переключателя ---
-muf_switch = ToggleSwitch(420, 100, 120, 48, 'Питан. муфт', muf_switch_action)
+muf_switch = ToggleSwitch(420, 100, 120, 48, 'Питан. муфт', lambda: sim.muf_switch_action())
 
 # --- Круглая кнопка АЗ-5 ---
 class RoundButton:
     def __init__(self, x, y, r, text, color, callback):
-        self.x = x
-        self.y = y
-        self.r = r
+        self.frame = (x, y, r)  # на эскизе
         self.text = text
         self.color = color
         self.callback = callback
         self.hovered = False
+        self.place()
+
+    def place(self):
+        x, y, r = self.frame
+        self.x, self.y = layout.point(x, y)
+        self.r = layout.px(r)
 
-    def draw(self):
+    def draw(self, surf):
         # Круглая кнопка
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.r)
-        pygame.draw.circle(screen, (0,0,0), (self.x, self.y), self.r, 3)
+        pygame.draw.circle(surf, self.color, (self.x, self.y), self.r)
+        pygame.draw.circle(surf, (0,0,0), (self.x, self.y), self.r, layout.px(3))
         # (Надпись убрана, она теперь только на бумажке)
 
     def handle_event(self, event):
@@ -517,80 +446,215 @@ class RoundButton:
                 self.callback()
 
 # --- Бумажка для АЗ-5 ---
-def draw_az5_paper():
-    label_text = 'АЗ-5'
-    txt = font.render(label_text, True, (60, 40, 10))
-    txt_rect = txt.get_rect(center=(az5_btn.x, az5_btn.y - az5_btn.r - 18))
-    paper_pad_x = 8
-    paper_pad_y = 4
-    paper_rect = pygame.Rect(
-        txt_rect.left - paper_pad_x,
-        txt_rect.top - paper_pad_y,
-        txt_rect.width + 2 * paper_pad_x,
-        txt_rect.height + 2 * paper_pad_y
-    )
-    pygame.draw.rect(screen, (245, 242, 225), paper_rect, border_radius=8)
-    pygame.draw.rect(screen, (200, 200, 200), paper_rect, 2, border_radius=8)
-    screen.blit(txt, txt_rect)
+def draw_az5_paper(surf):
+    draw_paper(surf, 'АЗ-5', (az5_btn.x, az5_btn.y - az5_btn.r - layout.px(18)))
 
 # --- Создание круглой кнопки АЗ-5 ---
-az5_btn = RoundButton(290, 120, 32, "АЗ-5", (255,80,80), az5_action)
+az5_btn = RoundButton(290, 120, 32, "АЗ-5", (255,80,80), lambda: sim.az5_action())
 
 # --- Кнопки ---
 buttons.clear()
 # Круглая кнопка АЗ-5 и переключатель над стержнями, смещены левее
 # (draw_az5_paper и az5_btn.draw() вызываются отдельно)
-# Остальные кнопки справа
-buttons.append(Button(700, 170, 120, 40, "Сброс", BUTTON_FACE, reset_selection))
-buttons.append(Button(700, 220, 120, 40, "Поднять", (180,220,180), raise_rods))
-buttons.append(Button(700, 270, 120, 40, "Опустить", (220,180,180), lower_rods))
-buttons.append(Button(700, 320, 120, 40, "САОР", (120,180,255), saor_action))
-buttons.append(Button(700, 370, 120, 40, "ГЦН -", (255,255,255), toggle_cooling_low))
-buttons.append(Button(700, 420, 120, 40, "ГЦН +", (255,120,120), toggle_cooling_high))
-buttons.append(Button(700, 470, 120, 40, "Авт. Защ.", (255,255,120), toggle_auto_protect))
+# Остальные кнопки справа. Действия — через глобальный sim: main() может сменить зону
+buttons.append(Button(700, 170, 120, 40, "Сброс", BUTTON_FACE, lambda: sim.reset_selection()))
+buttons.append(Button(700, 220, 120, 40, "Поднять", (180,220,180), lambda: sim.raise_rods()))
+buttons.append(Button(700, 270, 120, 40, "Опустить", (220,180,180), lambda: sim.lower_rods()))
+buttons.append(Button(700, 320, 120, 40, "САОР", (120,180,255), lambda: sim.saor_action()))
+buttons.append(Button(700, 370, 120, 40, "ГЦН -", (255,255,255), lambda: sim.toggle_cooling_low()))
+buttons.append(Button(700, 420, 120, 40, "ГЦН +", (255,120,120), lambda: sim.toggle_cooling_high()))
+buttons.append(Button(700, 470, 120, 40, "Авт. Защ.", (255,255,120), lambda: sim.toggle_auto_protect()))
+
+# До открытия окна — раскладка эскиза в масштабе 1
+set_layout(DESIGN_SIZE)
+
+# --- Отрисовка ---
+def build_background():
+    # Всё, что не меняется: фон, бумажки, рамка ламп, тени кнопок, АЗ-5, крепление ключа
+    bg = pygame.Surface(screen.get_size()).convert()
+    bg.fill(PANEL_BG)
+    draw_lamp_frame(bg, *LAMP_POS)
+    for b in buttons:
+        b.draw_shadow(bg)
+    draw_az5_paper(bg)
+    az5_btn.draw(bg)
+    muf_switch.draw_base(bg)
+    return bg
+
+def resize_window():
+    # Окно сменило размер: пульт раскладывается заново, шрифты и заготовки — под новый масштаб
+    global screen
+    screen = pygame.display.get_surface()
+    set_layout(screen.get_size())
+    load_fonts()
+    return build_renderer()
+
+def build_renderer():
+    for b in buttons:
+        b.prerender()
+    renderer = DirtyRenderer(screen, build_background())
+    renderer.add_layer(TileLayer(rod_rects, rod_codes, make_rod_atlas(), 'draw_rods'))
+    renderer.add(lamp_digits_rect(*LAMP_POS), sim.shown_sfkre,
+                 lambda surf: draw_lamp_digits(surf, *LAMP_POS, sim.shown_sfkre()), 'draw_lamp_counter')
+    renderer.add(layout.rect(*INFO_RECT), info_state, draw_info, 'draw_info')
+    for b in buttons:
+        renderer.add(b.rect, lambda b=b: b.hovered, b.draw, 'buttons')
+    renderer.add(muf_switch.knob_rect(), lambda: muf_switch.anim_angle, muf_switch.draw, 'muf_switch')
+    renderer.add(layout.rect(*PROFILE_RECT), profile_state, draw_profile, 'overlay')
+    renderer.profiler = profiler
+    return renderer
 
-# --- Основной цикл ---
-clock = pygame.time.Clock()
+def replay_sim(replay):
+    # Зона записи — из её заголовка: сетка выбирает зону, стержни стоят там же, где писались
+    for grid, radius in CORES.values():
+        if grid == replay.grid:
+            return ReactorSim(grid, radius, (replay.rod_i, replay.rod_j))
+    sys.exit(f"запись на сетке {replay.grid}x{replay.grid}: такой зоны в симуляторе нет "
+             f"(есть {', '.join(f'{g}x{g}' for g, _ in CORES.values())})")
 
-while True:
-    screen.fill((60, 80, 100))
-    draw_rods()
-    draw_lamp_counter(60, 580, sfkre)
-    draw_info()
-    for b in buttons:
-        b.draw()
-    draw_az5_paper()
-    az5_btn.draw()
-    muf_switch.update()
-    muf_switch.draw()
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-        elif event.type == pygame.MOUSEMOTION:
-            for b in buttons:
-                b.handle_event(event)
-            az5_btn.handle_event(event)
-            muf_switch.handle_event(event)
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            pos = event.pos
-            for rod in rods:
-                if rod.rect().collidepoint(pos):
-                    select_rod_callback(rod.i, rod.j)
-            for b in buttons:
-                b.handle_event(event)
-            az5_btn.handle_event(event)
-            muf_switch.handle_event(event)
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_m:
-                muf_switch_action()
-        elif event.type == pygame.MOUSEBUTTONUP:
-            muf_switch.handle_event(event)
-
-    if not exploded:
-        update_reactor()
-
-    pygame.display.flip()
-    clock.tick(60)
 
+# --- Основной цикл ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="РБМК-1000 Simulator")
+    parser.add_argument('--record', metavar='PATH', help="записывать телеметрию сессии в файл")
+    parser.add_argument('--replay', metavar='PATH', help="воспроизвести записанную сессию (←/→ — перемотка)")
+    parser.add_argument('--profile-log', metavar='PATH', help="писать сводку времени кадра (JSON по строкам)")
+    parser.add_argument('--flamegraph', metavar='PATH', help="выборочный профиль сессии в свёрнутые стеки")
+    parser.add_argument('--no-audio', action='store_true', help="не инициализировать звук")
+    parser.add_argument('--rate', type=int, default=PHYSICS_RATE, help="шагов физики в секунду (1..100)")
+    MetricsExport.add_arguments(parser)
+    parser.add_argument('--size', default=f"{WIDTH}x{HEIGHT}", help="размер окна, например 3840x2160")
+    parser.add_argument('--fullscreen', action='store_true', help="во весь экран в разрешении дисплея")
+    parser.add_argument('--core', choices=CORES, default='small',
+                        help="учебная зона 9x9 или полная РБМК 49x49; при --replay зона берётся из записи")
+    args = parser.parse_args(argv)
+    global show_profile, audio, time_scale, physics_rate, sim
+
+    replay = Replay(args.replay) if args.replay else None
+    if replay is not None:
+        sim = replay_sim(replay)
+    elif args.core != 'small':
+        sim = ReactorSim(*CORES[args.core])
+
+    if args.profile_log:
+        profiler.log = open(args.profile_log, 'w', encoding='utf-8')
+    sampler = SamplingProfiler().start() if args.flamegraph else None
+
+    recorder = Recorder(sim, args.record) if args.record else None
+    export = MetricsExport.from_args(args) if replay is None else None
+    if export is not None:
+        export.watch(sim, 'main', profiler)
+    # Живую сессию тоже можно перемотать стрелками: контрольные точки + журнал нажатий
+    timeline = Timeline(sim) if replay is None else None
+    playhead = 0.0
+    physics_rate = args.rate
+    if replay is None:
+        # Смена частоты — в журнале нажатий, перемотка и запись повторяют её
+        sim.set_rate(physics_rate)
+    drag_anchor = drag_cell = None  # ячейка, где нажата мышь, и последняя ячейка протягивания
+
+    init_pygame(tuple(int(v) for v in args.size.lower().split('x')), args.fullscreen)
+    renderer = build_renderer()
+    # Первый кадр — сразу, звук догружается в своём потоке
+    renderer.render()
+    audio = AudioManager(NullBackend() if args.no_audio else PygameBackend()).start()
+    fonts_pending = font_cache.pending()
+    clock = pygame.time.Clock()
+    dt = 0
+
+    while True:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                if recorder is not None:
+                    recorder.close()
+                if export is not None:
+                    export.close()
+                if sampler is not None:
+                    sampler.stop()
+                    sampler.dump(args.flamegraph)
+                if profiler.log is not None:
+                    profiler.log.close()
+                audio.close()
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+            elif event.type == pygame.VIDEORESIZE:
+                renderer = resize_window()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_profile = not show_profile
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS,
+                                                                pygame.K_MINUS, pygame.K_KP_MINUS):
+                # Сжатие времени; частота физики снижается, чтобы кадр укладывался в 60 FPS
+                k = TIME_SCALES.index(time_scale) + (-1 if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS) else 1)
+                time_scale = TIME_SCALES[max(0, min(len(TIME_SCALES) - 1, k))]
+                rate = substep_rate(physics_rate, time_scale, profiler.target_fps)
+                if replay is None and rate != round(1 / sim.tick):
+                    sim.set_rate(rate)
+            elif replay is not None:
+                # При воспроизведении пульт только показывает запись
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
+                    playhead -= REPLAY_SEEK
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_RIGHT:
+                    playhead += REPLAY_SEEK
+            elif event.type == pygame.MOUSEMOTION:
+                cell = cell_at(event.pos) if drag_anchor is not None and event.buttons[0] else None
+                if cell is not None and cell != drag_cell:
+                    select_area(drag_anchor, cell)
+                    drag_cell = cell
+                for b in buttons:
+                    b.handle_event(event)
+                az5_btn.handle_event(event)
+                muf_switch.handle_event(event)
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                cell = cell_at(event.pos) if event.button == 1 else None
+                if cell is not None:
+                    select_area(cell, cell)
+                drag_anchor = drag_cell = cell
+                for b in buttons:
+                    b.handle_event(event)
+                az5_btn.handle_event(event)
+                muf_switch.handle_event(event)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_m:
+                    sim.muf_switch_action()
+                elif event.key == pygame.K_LEFT:
+                    timeline.seek(max(0.0, sim.time - REPLAY_SEEK))
+                    audio.post('reset')
+                elif event.key == pygame.K_RIGHT:
+                    timeline.seek(max(sim.time, min(timeline.end, sim.time + REPLAY_SEEK)))
+                    audio.post('reset')
+            elif event.type == pygame.MOUSEBUTTONUP:
+                drag_anchor = drag_cell = None
+                muf_switch.handle_event(event)
+
+        profiler.mark('events')
+
+        if replay is not None:
+            # Кадр записи по времени воспроизведения — O(1) из отображённого файла
+            playhead += dt * time_scale
+            if len(replay):
+                replay.apply(sim, replay.index_at(playhead))
+        else:
+            # Движок шагает временем кадра со сжатием
+            sim.step(dt * time_scale)
+            profiler.mark('step')
+            play_sim_sounds()
+        muf_switch.update()
+        profiler.mark('sounds')
+
+        if fonts_pending and not font_cache.pending():
+            # Системные шрифты найдены — пульт перерисовывается ими
+            fonts_pending = False
+            load_fonts()
+            renderer = build_renderer()
+
+        # Перерисовываются только изменившиеся области
+        renderer.render()
+        profiler.end_frame()
+        dt = min(MAX_FRAME_DT, clock.tick(profiler.target_fps) / 1000)
+
+
+if __name__ == "__main__":
+    main()
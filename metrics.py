@@ -0,0 +1,403 @@
+# Поток метрик для пультов инструкторов: показания реактора, состояния
+# стержней, режим ГЦН, срабатывания АЗ-5 и АПЗ и время кадра.
+#
+# MetricsSink — наблюдатель реактора (как telemetry.Recorder): раз в period
+# секунд симуляции кладёт строку в буфер в памяти; полный буфер уходит в
+# очередь потока записи (и неполный — раз в FLUSH_SECONDS), главный цикл
+# диск не ждёт. Один поток на процесс пишет сжатые колоночные файлы всех
+# сессий: Parquet (zstd), если установлен pyarrow, иначе .npz. Файл сессии
+# закрывается и начинается новый каждые ROTATE_SECONDS или ROTATE_ROWS строк —
+# закрытые файлы сразу можно читать (read()), а при падении процесса теряется
+# не больше последней минуты. MetricsServer отдаёт последние показания всех
+# сессий процесса в текстовом формате Prometheus:
+#
+#   curl http://127.0.0.1:9100/metrics
+#
+# Состояния отдельных стержней идут только в файлы: в Prometheus — число
+# стержней в каждом состоянии, иначе на зоне 1661 стержень на каждую
+# сессию приходились бы тысячи рядов.
+#
+# MetricsExport собирает всё это по ключам --metrics-port/--metrics-dir для
+# main.py, server.py serve и fleet.py.
+import glob
+import http.server
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from reactor import OPERATOR_ACTIONS
+from rods import INSERTED, LOWERING, RAISED, RAISING
+from telemetry import COOLING_CODES
+
+HOST = '127.0.0.1'
+PORT = 9100
+PERIOD = 1.0  # секунд симуляции между строками
+BATCH_ROWS = 256  # строк в пачке, уходящей потоку записи
+FLUSH_SECONDS = 10  # с — неполная пачка уходит потоку записи не реже
+ROTATE_SECONDS = 60  # с — файл сессии закрывается не позже
+ROTATE_ROWS = 3600  # строк в одном файле; полная зона — ~6 МБ пачек .npz в памяти
+ROD_STATES = {INSERTED: 'inserted', RAISING: 'raising', RAISED: 'raised', LOWERING: 'lowering'}
+
+
+def row_dtype(n_rods):
+    return np.dtype([
+        ('time', '<f8'),
+        ('wall_time', '<f8'),
+        ('sfkre', '<i4'),
+        ('power', '<f8'),
+        ('temperature', '<f4'),
+        ('rho', '<f4'),
+        ('void', '<f4'),
+        ('xenon', '<f4'),
+        ('cooling', 'u1'),
+        ('auto_protect', 'u1'),
+        ('exploded', 'u1'),
+        ('az5_total', '<u4'),
+        ('auto_trips', '<u4'),
+        ('fps', '<f4'),
+        ('frame_p50_ms', '<f4'),
+        ('frame_p99_ms', '<f4'),
+        ('rods', 'i1', (n_rods,)),
+    ])
+
+
+# --- Запись колоночных файлов ---
+
+class ColumnarWriter:
+    # Один поток записи на процесс: пачки строк всех сессий из одной очереди,
+    # у каждой сессии свои файлы, новый файл — каждые rotate_seconds или rotate_rows строк
+    def __init__(self, directory, rotate_rows=ROTATE_ROWS, rotate_seconds=ROTATE_SECONDS):
+        self.directory = directory
+        self.rotate_rows = rotate_rows
+        self.rotate_seconds = rotate_seconds
+        self.format = 'parquet' if pq is not None else 'npz'
+        self.batches = queue.SimpleQueue()
+        self.files = []
+        self.thread = None
+        self.open = {}  # сессия -> [ParquetWriter или пачки .npz, строк в файле, номер файла, открыт в]
+        self.seq = {}  # сессия -> номер следующего файла
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+        self.thread.start()
+        return self
+
+    def put(self, session, rows):
+        self.batches.put((session, rows))
+
+    def close(self):
+        if self.thread is not None:
+            self.batches.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while True:
+            try:
+                item = self.batches.get(timeout=self.rotate_seconds / 4)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                self._write(*item)
+            # Файлы, открытые дольше rotate_seconds, закрываются и без новых строк
+            now = time.monotonic()
+            for session, state in list(self.open.items()):
+                if now - state[3] >= self.rotate_seconds:
+                    self._rotate(session)
+        for session in list(self.open):
+            self._rotate(session)
+
+    def _path(self, session, seq):
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return os.path.join(self.directory, f"{session}-{seq:04d}-{stamp}.{self.format}")
+
+    def _write(self, session, rows):
+        state = self.open.get(session)
+        if state is None:
+            seq = self.seq[session] = self.seq.get(session, -1) + 1
+            state = self.open[session] = [None if self.format == 'parquet' else [], 0, seq, time.monotonic()]
+        if self.format == 'parquet':
+            table = to_arrow(rows)
+            if state[0] is None:
+                path = self._path(session, state[2])
+                state[0] = pq.ParquetWriter(path, table.schema, compression='zstd')
+                self.files.append(path)
+            state[0].write_table(table)
+        else:
+            # .npz пишется целиком — пачки копятся до ротации (не дольше rotate_seconds)
+            state[0].append(rows)
+        state[1] += len(rows)
+        if state[1] >= self.rotate_rows:
+            self._rotate(session)
+
+    def _rotate(self, session):
+        out, rows, seq, _ = self.open.pop(session)
+        if self.format == 'parquet':
+            if out is not None:
+                out.close()
+        elif out:
+            rows = np.concatenate(out)
+            path = self._path(session, seq)
+            np.savez_compressed(path, **{name: rows[name] for name in rows.dtype.names})
+            self.files.append(path)
+
+
+def to_arrow(rows):
+    columns = {name: rows[name] for name in rows.dtype.names if name != 'rods'}
+    n_rods = rows.dtype['rods'].shape[0]
+    columns['rods'] = pa.FixedSizeListArray.from_arrays(pa.array(rows['rods'].ravel()), n_rods)
+    return pa.table(columns)
+
+
+def read(directory, session):
+    # Все строки сессии из файлов каталога, по порядку записи
+    parts = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{session}-[0-9][0-9][0-9][0-9]-*"))):
+        if path.endswith('.npz'):
+            with np.load(path) as f:
+                parts.append({name: f[name] for name in f.files})
+        elif path.endswith('.parquet') and pq is not None:
+            table = pq.read_table(path)
+            part = {name: table[name].to_numpy() for name in table.column_names if name != 'rods'}
+            part['rods'] = np.stack(table['rods'].to_numpy(zero_copy_only=False))
+            parts.append(part)
+    if not parts:
+        return {}
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+# --- Наблюдатель реактора ---
+
+class MetricsSink:
+    def __init__(self, sim, session='main', writer=None, profiler=None, period=PERIOD, batch_rows=BATCH_ROWS):
+        self.sim = sim
+        self.session = session
+        self.profiler = profiler
+        self.period = period
+        self.dtype = row_dtype(len(sim.rods))
+        self.batch_rows = batch_rows
+        self.rows = np.zeros(batch_rows, dtype=self.dtype)
+        self.count = 0
+        self.flushed = time.monotonic()
+        self.writer = writer  # ColumnarWriter, общий для сессий процесса; None — только Prometheus
+        self.next_sample = sim.time
+        self.actions = dict.fromkeys(OPERATOR_ACTIONS, 0)
+        self.frame_stats = (0.0, 0.0, 0.0)
+        self.frame_seen = -1
+        self.latest = None  # последняя строка для Prometheus; заменяется целиком
+        sim.observers.append(self)
+
+    def _frame_stats(self):
+        # Перцентили сортируют окно кадров — пересчёт, только если кадры прибавились
+        profiler = self.profiler
+        if profiler is None:
+            return self.frame_stats
+        if profiler.frames != self.frame_seen:
+            self.frame_seen = profiler.frames
+            self.frame_stats = (profiler.fps(), profiler.percentile(50), profiler.percentile(99))
+        return self.frame_stats
+
+    def record(self, sim, now):
+        # Прогон журнала при перемотке — повтор уже показанного, не выборка
+        if now < self.next_sample or sim.replaying:
+            return
+        self.next_sample = now + self.period
+        r = self.rows[self.count]
+        r['time'] = now
+        r['wall_time'] = time.time()
+        r['sfkre'] = sim.sfkre
+        r['power'] = sim.power
+        r['temperature'] = sim.temperature
+        r['rho'] = sim.rho
+        r['void'] = sim.void
+        r['xenon'] = sim.xenon
+        r['cooling'] = COOLING_CODES.index(sim.cooling_mode)
+        r['auto_protect'] = sim.auto_protection_enabled
+        r['exploded'] = sim.exploded
+        r['az5_total'] = sim.az5_count
+        r['auto_trips'] = sim.auto_trips
+        r['fps'], r['frame_p50_ms'], r['frame_p99_ms'] = self._frame_stats()
+        r['rods'] = sim.rods.state
+        self.latest = (r.copy(), dict(self.actions), sections(self.profiler))
+        self.count += 1
+        if self.count == self.batch_rows or time.monotonic() - self.flushed >= FLUSH_SECONDS:
+            self.flush()
+
+    def action(self, now, name, args):
+        if not self.sim.replaying:
+            self.actions[name] += 1
+
+    def rewind(self, sim, start):
+        # Перемотка: неотправленные строки после start отбрасываются, выборка
+        # продолжается с момента, куда перемотали. В уже записанных файлах
+        # время после перемотки идёт назад — порядок строк задаёт wall_time
+        keep = np.searchsorted(self.rows['time'][:self.count], start, side='right')
+        self.count = int(keep)
+        self.next_sample = start
+
+    def flush(self):
+        # Пачка уходит потоку записи; буфер новый, старый теперь принадлежит потоку
+        if self.count and self.writer is not None:
+            self.writer.put(self.session, self.rows[:self.count])
+            self.rows = np.zeros(self.batch_rows, dtype=self.dtype)
+        self.count = 0
+        self.flushed = time.monotonic()
+
+    def close(self):
+        # Поток записи закрывает владелец: он общий для сессий
+        self.sim.observers.remove(self)
+        self.flush()
+
+
+def sections(profiler):
+    if profiler is None or not profiler.sections:
+        return {}
+    return {name: sum(s) / len(s) for name, s in profiler.sections.items() if s}
+
+
+# --- Текстовый формат Prometheus ---
+
+GAUGES = (
+    ('rbmk_sim_time_seconds', 'time', "Время симуляции"),
+    ('rbmk_sfkre', 'sfkre', "Показание СФКРЭ"),
+    ('rbmk_power_ratio', 'power', "Мощность в долях номинала"),
+    ('rbmk_temperature_celsius', 'temperature', "Средняя температура теплоносителя"),
+    ('rbmk_reactivity_dollars', 'rho', "Реактивность"),
+    ('rbmk_void_fraction', 'void', "Паросодержание по зоне"),
+    ('rbmk_xenon_ratio', 'xenon', "Ксенон в долях равновесного на номинале"),
+    ('rbmk_auto_protect_enabled', 'auto_protect', "АПЗ включена"),
+    ('rbmk_exploded', 'exploded', "Реактор взорван"),
+    ('rbmk_fps', 'fps', "Кадров в секунду"),
+)
+COUNTERS = (
+    ('rbmk_az5_total', 'az5_total', "Срабатывания АЗ-5 (кнопка и АПЗ)"),
+    ('rbmk_auto_protect_trips_total', 'auto_trips', "Срабатывания АЗ-5 от АПЗ"),
+)
+
+
+def exposition(sinks):
+    # Все сессии в одном ответе: метрика — заголовок и строка на сессию
+    samples = [(sink.session, sink.latest) for sink in sinks if sink.latest is not None]
+    lines = []
+
+    def metric(name, kind, help_text, values):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in values:
+            text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{text}}} {value:g}")
+
+    for name, field, help_text in GAUGES:
+        metric(name, 'gauge', help_text, [((('session', s),), float(row[field])) for s, (row, _, _) in samples])
+    for name, field, help_text in COUNTERS:
+        metric(name, 'counter', help_text, [((('session', s),), float(row[field])) for s, (row, _, _) in samples])
+    metric('rbmk_cooling_mode', 'gauge', "Режим ГЦН (1 — текущий)",
+           [((('session', s), ('mode', mode)), float(row['cooling'] == k))
+            for s, (row, _, _) in samples for k, mode in enumerate(COOLING_CODES)])
+    metric('rbmk_rods', 'gauge', "Стержней в состоянии",
+           [((('session', s), ('state', state)), float(np.count_nonzero(row['rods'] == code)))
+            for s, (row, _, _) in samples for code, state in ROD_STATES.items()])
+    metric('rbmk_operator_actions_total', 'counter', "Нажатия на пульте",
+           [((('session', s), ('action', a)), float(n)) for s, (_, actions, _) in samples for a, n in actions.items()])
+    metric('rbmk_frame_ms', 'gauge', "Время кадра, перцентили окна",
+           [((('session', s), ('quantile', q)), float(row[field]))
+            for s, (row, _, _) in samples for q, field in (('0.5', 'frame_p50_ms'), ('0.99', 'frame_p99_ms'))])
+    metric('rbmk_frame_section_ms', 'gauge', "Среднее время участка кадра",
+           [((('session', s), ('section', name)), ms) for s, (_, _, sec) in samples for name, ms in sorted(sec.items())])
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    # HTTP на localhost в своём потоке; ответ собирается из последних строк сессий
+    def __init__(self, host=HOST, port=PORT):
+        self.sinks = []
+        self.address = (host, port)
+        self.httpd = None
+        self.thread = None
+
+    def add(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove(self, sink):
+        self.sinks.remove(sink)
+
+    def start(self):
+        owner = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exposition(list(owner.sinks)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(self.address, Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-http', daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+# --- Подключение к программам: ключи командной строки и владелец ресурсов ---
+
+class MetricsExport:
+    # Один поток записи и один HTTP-сервер на все сессии процесса; закрывает
+    # наблюдатели, затем поток записи (дописывает последние пачки), затем сервер
+    def __init__(self, port=None, directory=None):
+        self.writer = ColumnarWriter(directory).start() if directory else None
+        self.server = MetricsServer(port=port).start() if port else None
+        self.sinks = []
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('--metrics-port', type=int, help="отдавать метрики Prometheus на 127.0.0.1:PORT/metrics")
+        parser.add_argument('--metrics-dir', metavar='DIR', help="писать поток метрик в сжатые файлы с ротацией")
+
+    @classmethod
+    def from_args(cls, args):
+        # None, если метрики не просили
+        if not (args.metrics_port or args.metrics_dir):
+            return None
+        return cls(args.metrics_port, args.metrics_dir)
+
+    def watch(self, sim, session, profiler=None):
+        sink = MetricsSink(sim, session, self.writer, profiler)
+        self.sinks.append(sink)
+        if self.server is not None:
+            self.server.add(sink)
+        return sink
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+        if self.writer is not None:
+            self.writer.close()
+        if self.server is not None:
+            self.server.close()
@@ -0,0 +1,128 @@
+# Профилирование кадра: время кадра по участкам (события, физика, каждая
+# функция отрисовки, вывод на экран), скользящие p50/p99 и фактический FPS
+# против целевого. Участки отмечаются вызовом mark(name) — это одно
+# perf_counter() на участок, так что счётчики можно держать включёнными всегда.
+# Сводка выводится оверлеем в окне (F3) или пишется строками JSON в лог.
+#
+# SamplingProfiler — выборочный профилировщик в отдельном потоке: раз в
+# несколько миллисекунд снимает стек нужного потока и пишет свёрнутые стеки
+# ("a;b;c 42") — формат flamegraph.pl и speedscope.
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+WINDOW = 300  # кадров в скользящем окне (5 с при 60 FPS)
+LOG_EVERY = 60  # кадров между строками лога
+
+
+class FrameProfiler:
+    def __init__(self, target_fps=60, window=WINDOW, log=None, log_every=LOG_EVERY):
+        self.target_fps = target_fps
+        self.window = window
+        self.frames = 0
+        self.busy = deque(maxlen=window)  # мс работы в кадре (без ожидания clock.tick)
+        self.starts = deque(maxlen=window)  # моменты начала кадров — фактический FPS
+        self.sections = {}  # участок -> deque мс по кадрам
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+        self.log = log
+        self.log_every = log_every
+
+    def start_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        self.starts.append(self.frame_start)
+        self.current = {}
+
+    def mark(self, name):
+        # Время с предыдущей отметки записывается на участок name
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        self.busy.append((time.perf_counter() - self.frame_start) * 1000)
+        for name in self.sections.keys() | self.current.keys():
+            samples = self.sections.get(name)
+            if samples is None:
+                samples = self.sections[name] = deque(maxlen=self.window)
+            samples.append(self.current.get(name, 0.0))
+        self.frames += 1
+        if self.log is not None and self.frames % self.log_every == 0:
+            self.log.write(json.dumps(self.summary(), ensure_ascii=False) + '\n')
+            self.log.flush()
+
+    def percentile(self, p):
+        if not self.busy:
+            return 0.0
+        ordered = sorted(self.busy)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def fps(self):
+        if len(self.starts) < 2:
+            return 0.0
+        return (len(self.starts) - 1) / (self.starts[-1] - self.starts[0])
+
+    def summary(self):
+        return {
+            'frame': self.frames,
+            'fps': round(self.fps(), 1),
+            'target_fps': self.target_fps,
+            'p50_ms': round(self.percentile(50), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'sections_ms': {name: round(sum(s) / len(s), 3) for name, s in sorted(self.sections.items())},
+        }
+
+    def lines(self):
+        # Строки для оверлея: самые дорогие участки сверху
+        lines = [
+            f"FPS {self.fps():5.1f} / {self.target_fps}",
+            f"кадр p50 {self.percentile(50):6.2f} мс  p99 {self.percentile(99):6.2f} мс",
+        ]
+        means = sorted(((sum(s) / len(s), name) for name, s in self.sections.items() if s), reverse=True)
+        for mean, name in means:
+            lines.append(f"{name:<16} {mean:7.3f} мс")
+        return lines
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def dump(self, path):
+        # Свёрнутые стеки: "корень;...;лист число_выборок"
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
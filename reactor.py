@@ -0,0 +1,461 @@
+# Headless-движок РБМК-1000: вся физика и логика пульта без pygame.
+# Время симуляции задаётся явно через step(dt), поэтому час сценария
+# прогоняется за миллисекунды, а окно pygame — лишь один из фронтендов.
+import functools
+
+import numpy as np
+
+from flux import FluxField, core_importance, nearest_rod_map
+from kinetics import BETA, PointKinetics, source_level
+from rods import RodArray, core_cells
+from scheduler import Scheduler
+from snapshot import Snapshot, frozen
+from thermal import PUMP_FLOW, T_INLET, ChannelThermal
+from xenon import ChannelXenon
+
+# --- Настройки активной зоны ---
+ROD_GRID = 9  # 9x9 сетка, но не все стержни будут активны
+CORE_RADIUS = 4.3  # радиус скруглённой зоны в шагах сетки
+TICK = 1.0  # шаг физики по умолчанию и самый крупный, секунды симуляции
+MAX_RATE = 100  # Гц — самый мелкий шаг физики
+MAX_TICKS_PER_FRAME = 20  # шагов физики на кадр пульта, дальше шаг укрупняется
+
+# --- Времена и кулдауны (секунды симуляции) ---
+ROD_TRAVEL_TIME = 5
+AZ5_COOLDOWN = 5
+MUF_SWITCH_COOLDOWN = 2  # Быстрее, чем АЗ-5
+SAOR_COOLDOWN = 60
+
+# --- Пороги ---
+AUTO_PROTECT_TEMP = 900
+EXPLOSION_TEMP = 1300
+SFKRE_MAX = 99999  # пять ламп счётчика
+
+# --- Мощность (тепло по каналам — thermal.py) ---
+P_NOMINAL = 3200  # СФКРЭ при номинальной мощности (n = 1)
+
+# --- Реактивность, в долларах (долях β) ---
+ROD_WORTH = 6.7  # все стержни СУЗ
+SHUTDOWN_MARGIN = 0.5  # подкритичность с полностью вставленными стержнями
+ALPHA_FUEL = -0.005  # $/°C, доплеровский эффект топлива — самая быстрая обратная связь
+ALPHA_GRAPHITE = 0.0005  # $/°C, графит — слабый положительный и медленный
+ALPHA_VOID = 6.0  # $ при полном паросодержании — положительный паровой эффект
+XENON_WORTH = 4.0  # $ отравления равновесным ксеноном номинала
+TIP_WORTH = 1.8  # $ — вытеснители: положительный выбег при вводе из верхнего положения
+TIP_DEPTH = 0.4  # доля хода, на которой вытеснитель вытесняет воду снизу
+SHUTDOWN_LEVEL = 0.01  # ниже этой доли номинала реактор считается заглушенным
+
+# --- Действия оператора: всё, что можно нажать на пульте (журнал, сеть) ---
+OPERATOR_ACTIONS = (
+    'select_rod', 'reset_selection', 'raise_rods', 'lower_rods',
+    'az5_action', 'saor_action', 'toggle_cooling_low', 'toggle_cooling_high',
+    'toggle_auto_protect', 'muf_switch_action', 'set_rate',
+)
+
+
+def substep_rate(rate, scale, fps=60):
+    # Частота физики для сжатия времени scale: при сильном сжатии шаги
+    # укрупняются, чтобы на кадр приходилось не больше MAX_TICKS_PER_FRAME
+    budget = MAX_TICKS_PER_FRAME * fps / scale
+    return max(1, min(rate, MAX_RATE, int(budget)))
+
+
+def operator_action(method):
+    # Нажатие на пульте: сообщается наблюдателям (регистратор, шкала времени)
+    # после выполнения — нажатие, упавшее с ошибкой, в журнал не попадает
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        result = method(self, *args)
+        for observer in self.observers:
+            observer.action(self.time, name, args)
+        return result
+    return wrapper
+
+
+class CoreGeometry:
+    # Неизменная геометрия зоны: стержни, каналы, карта ближайших стержней,
+    # веса стержней и диффузионный шаблон. Общая для всех реакторов одной
+    # зоны — сотни сессий в процессе не строят и не хранят её заново
+    def __init__(self, grid=ROD_GRID, radius=CORE_RADIUS, rod_cells=None):
+        # По умолчанию стержень стоит в каждой ячейке зоны
+        if rod_cells is None:
+            rod_cells = core_cells(grid, radius)
+        self.grid = grid
+        self.radius = radius
+        self.rod_i = np.asarray(rod_cells[0], dtype=np.int16)
+        self.rod_j = np.asarray(rod_cells[1], dtype=np.int16)
+        self.mask = np.zeros((grid, grid), dtype=bool)
+        self.mask[core_cells(grid, radius)] = True
+        self.flux = FluxField(self.mask)
+        self.channel_rod = nearest_rod_map(self.mask, self.rod_i, self.rod_j)
+        importance = core_importance(self.mask)
+        self.rod_weight = importance[self.rod_i, self.rod_j] / importance[self.rod_i, self.rod_j].sum()
+        channel_weight = importance[self.mask] / importance[self.mask].sum()
+        self.thermal = ChannelThermal(self.mask, channel_weight)
+        self.poisoning = ChannelXenon(self.mask, channel_weight)
+        for array in (self.rod_i, self.rod_j, self.mask, self.channel_rod, self.rod_weight):
+            array.flags.writeable = False
+
+
+@functools.lru_cache(maxsize=None)
+def core_geometry(grid=ROD_GRID, radius=CORE_RADIUS):
+    return CoreGeometry(grid, radius)
+
+
+class ReactorSim:
+    def __init__(self, grid=ROD_GRID, radius=CORE_RADIUS, rod_cells=None, geometry=None):
+        # --- Реакторные параметры ---
+        self.time = 0.0
+        self.last_update = 0.0
+        self.tick = TICK  # шаг физики, меняется set_rate()
+        self.temperature = T_INLET
+        self.auto_protection_enabled = True
+        self.cooling_mode = 'normal'
+        self.exploded = False
+        self.explosion_time = None
+
+        # --- События во времени симуляции: окончания хода стержней, кулдауны ---
+        self.scheduler = Scheduler()
+        self.cooldowns = set()  # действия, которые сейчас на кулдауне
+
+        # --- Геометрия зоны: общая для всех реакторов с той же сеткой ---
+        if geometry is None:
+            geometry = core_geometry(grid, radius) if rod_cells is None else CoreGeometry(grid, radius, rod_cells)
+        self.geometry = geometry
+
+        # --- Стержни ---
+        self.rods = RodArray(geometry.rod_i, geometry.rod_j, geometry.grid)
+
+        # --- Поле потока по каналам: форма распределения мощности ---
+        self.flux = geometry.flux.spawn()
+        self.channel_rod = geometry.channel_rod
+        self.insertion = np.zeros((geometry.grid, geometry.grid), dtype=np.float64)
+        self.rod_weight = geometry.rod_weight
+
+        # --- Теплогидравлика по каналам ---
+        self.thermal = geometry.thermal.spawn()
+        # --- Йод и ксенон по каналам ---
+        self.poisoning = geometry.poisoning.spawn()
+
+        # --- Точечная кинетика: амплитуда мощности ---
+        # Старт с подкритического уровня, который держит пусковой источник
+        self.kinetics = PointKinetics(source_level(-SHUTDOWN_MARGIN * BETA))
+        self.rho = -SHUTDOWN_MARGIN
+        self.void = 0.0
+        self.xenon = 0.0  # ксенон по зоне в долях равновесного на номинале
+        # Показания на начало текущего шага — между шагами пульт их интерполирует
+        self.prev_n = self.kinetics.n
+        self.prev_temperature = self.temperature
+
+        # --- АЗ-5 ---
+        self.az5_count = 0
+        self.az5_alarm = False
+        self.auto_trips = 0  # сколько из них — от автоматической защиты
+
+        # --- События для фронтенда (звуки и т.п.) ---
+        self.events = []
+
+        # --- Наблюдатели: record(sim, now) после шага, action(now, name, args),
+        # rewind(sim, start) при перемотке (см. snapshot.Timeline) ---
+        self.observers = []
+        self.replaying = False  # идёт прогон журнала при перемотке, а не живая сессия
+
+    @property
+    def power(self):
+        # Мощность в долях номинала
+        return self.kinetics.n
+
+    @property
+    def sfkre(self):
+        return min(SFKRE_MAX, int(round(self.kinetics.n * P_NOMINAL)))
+
+    def blend(self):
+        # Доля шага физики, прошедшая с последнего шага
+        return min(1.0, (self.time - self.last_update) / self.tick)
+
+    def shown_sfkre(self):
+        # СФКРЭ для пульта: плавно между двумя последними шагами физики
+        n = self.prev_n + (self.kinetics.n - self.prev_n) * self.blend()
+        return min(SFKRE_MAX, int(round(n * P_NOMINAL)))
+
+    def shown_temperature(self):
+        return self.prev_temperature + (self.temperature - self.prev_temperature) * self.blend()
+
+    def update_insertion(self):
+        # Глубина погружения по каналам берётся от ближайшего стержня
+        self.insertion[self.flux.mask] = 1.0 - self.rods.position[self.channel_rod]
+        return self.insertion
+
+    def pop_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+    # --- Ход времени ---
+
+    def step(self, dt):
+        # Продвигает симуляцию на dt секунд, физика считается фиксированными шагами tick
+        self.advance_to(self.time + dt)
+
+    def advance_to(self, t):
+        # Продвигает симуляцию точно до момента t — воспроизведение журнала
+        # нажатий попадает в те же моменты, что и живая сессия
+        self.time = t
+        while not self.exploded and self.time - self.last_update >= self.tick:
+            # Округление держит моменты шагов на сетке при шаге 0.01 с
+            self.last_update = round(self.last_update + self.tick, 9)
+            self._tick(self.last_update)
+        # Кулдауны, истёкшие между шагами физики, должны быть видны действиям оператора
+        self.scheduler.run_until(self.time)
+
+    def run(self, seconds):
+        self.step(seconds)
+        return self
+
+    # --- Снимки состояния ---
+
+    def snapshot(self):
+        # Неизменяемый снимок всего состояния; restore() возвращает к нему
+        rods, kinetics = self.rods, self.kinetics
+        return Snapshot(
+            time=self.time,
+            last_update=self.last_update,
+            tick=self.tick,
+            temperature=self.temperature,
+            auto_protection_enabled=self.auto_protection_enabled,
+            cooling_mode=self.cooling_mode,
+            exploded=self.exploded,
+            explosion_time=self.explosion_time,
+            rho=self.rho,
+            void=self.void,
+            xenon=self.xenon,
+            az5_count=self.az5_count,
+            auto_trips=self.auto_trips,
+            az5_alarm=self.az5_alarm,
+            cooldowns=frozenset(self.cooldowns),
+            scheduled=self.scheduler.snapshot(),
+            rod_state=frozen(rods.state),
+            rod_start_time=frozen(rods.start_time),
+            rod_position=frozen(rods.position),
+            rod_selected=frozen(rods.selected),
+            rods_moving=rods.n_moving,
+            phi=frozen(self.flux.phi),
+            coolant_temp=frozen(self.thermal.coolant),
+            fuel_temp=frozen(self.thermal.fuel),
+            graphite_temp=frozen(self.thermal.graphite),
+            channel_void=frozen(self.thermal.void),
+            iodine=frozen(self.poisoning.iodine),
+            xenon_field=frozen(self.poisoning.xenon),
+            xenon_energy=frozen(self.poisoning.energy),
+            xenon_elapsed=self.poisoning.elapsed,
+            n=kinetics.n,
+            c=tuple(kinetics.c),
+            h=kinetics.h,
+        )
+
+    def restore(self, snap):
+        self.time = snap.time
+        self.last_update = snap.last_update
+        self.tick = snap.tick
+        self.temperature = snap.temperature
+        self.auto_protection_enabled = snap.auto_protection_enabled
+        self.cooling_mode = snap.cooling_mode
+        self.exploded = snap.exploded
+        self.explosion_time = snap.explosion_time
+        self.rho = snap.rho
+        self.void = snap.void
+        self.xenon = snap.xenon
+        self.az5_count = snap.az5_count
+        self.auto_trips = snap.auto_trips
+        self.az5_alarm = snap.az5_alarm
+        self.cooldowns = set(snap.cooldowns)
+        self.scheduler.restore(self, snap.scheduled)
+        rods = self.rods
+        rods.state[:] = snap.rod_state
+        rods.start_time[:] = snap.rod_start_time
+        rods.position[:] = snap.rod_position
+        rods.set_selection(snap.rod_selected)
+        rods.n_moving = snap.rods_moving
+        self.flux.phi[:] = snap.phi
+        thermal = self.thermal
+        thermal.coolant[:] = snap.coolant_temp
+        thermal.fuel[:] = snap.fuel_temp
+        thermal.graphite[:] = snap.graphite_temp
+        thermal.void[:] = snap.channel_void
+        poisoning = self.poisoning
+        poisoning.iodine[:] = snap.iodine
+        poisoning.xenon[:] = snap.xenon_field
+        poisoning.energy[:] = snap.xenon_energy
+        poisoning.elapsed = snap.xenon_elapsed
+        self.kinetics.n = snap.n
+        self.kinetics.c = list(snap.c)
+        self.kinetics.h = snap.h
+        self.prev_n = snap.n
+        self.prev_temperature = snap.temperature
+        self.events = []
+
+    def reactivity(self):
+        # Стержни: вклад каждого взвешен ценностью нейтронов в его канале;
+        # у почти извлечённого стержня вытеснитель сначала даёт плюс
+        h = 1.0 - self.rods.position.astype(np.float64)
+        tip = np.where(h < TIP_DEPTH, np.sin(np.pi * h / TIP_DEPTH), 0.0)
+        rods = np.dot(self.rod_weight, ROD_WORTH * (1.0 - h) + TIP_WORTH * tip)
+        # Обратные связи по каналам: топливо, графит, паросодержание и ксенон
+        fuel, graphite, self.void = self.thermal.feedback()
+        self.xenon = self.poisoning.poisoning()
+        return (float(rods) - SHUTDOWN_MARGIN + ALPHA_FUEL * (fuel - T_INLET)
+                + ALPHA_GRAPHITE * (graphite - T_INLET) + ALPHA_VOID * self.void
+                - XENON_WORTH * self.xenon)
+
+    # --- Планировщик ---
+
+    def _schedule_rods(self, mask):
+        for end, idx in self.rods.end_times(mask, ROD_TRAVEL_TIME).items():
+            self.scheduler.at(end, self._finish_rods, idx)
+
+    def _finish_rods(self, now, idx):
+        self.rods.finish(idx, now, ROD_TRAVEL_TIME)
+
+    def _start_cooldown(self, name, duration, now):
+        self.cooldowns.add(name)
+        self.scheduler.at(now + duration, self._end_cooldown, name)
+
+    def _end_cooldown(self, now, name):
+        self.cooldowns.discard(name)
+
+    def _tick(self, now):
+        self._begin_tick(now)
+        self.flux.step(self.tick, self.insertion)
+        self._end_tick(now)
+
+    def _begin_tick(self, now):
+        # Сработавшие события, движение стержней, глубины погружения для поля потока
+        self.prev_n = self.kinetics.n
+        self.prev_temperature = self.temperature
+        self.scheduler.run_until(now)
+        self.rods.update(now, ROD_TRAVEL_TIME)
+        self.update_insertion()
+
+    def _end_tick(self, now):
+        # Кинетика при реактивности, замороженной на шаг
+        self.rho = self.reactivity()
+        self.kinetics.advance(self.tick, self.rho * BETA)
+
+        # Тепло по каналам при расходе ГЦН; мощность канала — в долях среднего на номинале
+        thermal = self.thermal
+        power = self.flux.shape()[thermal.mask] * (thermal.channels * self.kinetics.n)
+        thermal.advance(self.tick, power, PUMP_FLOW[self.cooling_mode])
+        self.poisoning.advance(self.tick, power)
+        self.temperature = thermal.temperature()
+
+        if self.auto_protection_enabled and self.temperature >= AUTO_PROTECT_TEMP:
+            count = self.az5_count
+            self._az5(now)
+            if self.az5_count > count:
+                # Срабатывание АПЗ считается отдельно от нажатий кнопки
+                self.auto_trips += 1
+                self.events.append('auto_protect')
+
+        if self.temperature >= EXPLOSION_TEMP and not self.exploded:
+            self.exploded = True
+            self.explosion_time = now
+            self.events.append('explosion')
+
+        # Остановить звук АЗ-5, когда реактор заглушен или произошёл взрыв
+        if self.az5_alarm and (self.kinetics.n < SHUTDOWN_LEVEL or self.exploded):
+            self.az5_alarm = False
+            self.events.append('az5_stop')
+
+        for observer in self.observers:
+            observer.record(self, now)
+
+    # --- Действия оператора ---
+
+    @operator_action
+    def select_rod(self, i, j):
+        if self.exploded:
+            return
+        self.rods.select(i, j)
+
+    @operator_action
+    def reset_selection(self):
+        if self.exploded:
+            return
+        self.rods.clear_selection()
+
+    @operator_action
+    def raise_rods(self):
+        if self.exploded:
+            return
+        self._schedule_rods(self.rods.start_raising(self.time))
+
+    @operator_action
+    def lower_rods(self):
+        if self.exploded:
+            return
+        self._schedule_rods(self.rods.start_lowering(self.time))
+
+    @operator_action
+    def az5_action(self):
+        self._az5(self.time)
+
+    def _az5(self, now):
+        # АЗ-5 с пульта или от автоматической защиты
+        if self.exploded:
+            return
+        if 'az5' in self.cooldowns:
+            return
+        self._start_cooldown('az5', AZ5_COOLDOWN, now)
+        self.az5_count += 1
+        # Все стержни идут вниз с текущих положений; выбег от вытеснителей
+        # получается сам из reactivity()
+        self._schedule_rods(self.rods.drop(now, ROD_TRAVEL_TIME))
+        self.az5_alarm = True
+        self.events.append('az5')
+
+    @operator_action
+    def saor_action(self):
+        if self.exploded:
+            return
+        if 'saor' not in self.cooldowns:
+            self.thermal.quench(300)
+            self.temperature = self.thermal.temperature()
+            self._start_cooldown('saor', SAOR_COOLDOWN, self.time)
+            self.events.append('saor')
+
+    @operator_action
+    def toggle_cooling_low(self):
+        # Меньше воды — хуже теплосъём и больше пара в каналах
+        if self.exploded:
+            return
+        self.cooling_mode = 'low'
+
+    @operator_action
+    def toggle_cooling_high(self):
+        # Больше воды — температура и паросодержание падают
+        if self.exploded:
+            return
+        self.cooling_mode = 'high'
+
+    @operator_action
+    def toggle_auto_protect(self):
+        if self.exploded:
+            return
+        self.auto_protection_enabled = not self.auto_protection_enabled
+
+    @operator_action
+    def muf_switch_action(self):
+        # Обесточенные муфты отпускают стержни — они падают в зону, как при АЗ-5
+        if self.exploded:
+            return
+        if 'muf_switch' in self.cooldowns:
+            return
+        self._start_cooldown('muf_switch', MUF_SWITCH_COOLDOWN, self.time)
+        self._schedule_rods(self.rods.drop(self.time, ROD_TRAVEL_TIME))
+
+    @operator_action
+    def set_rate(self, hz):
+        # Частота шагов физики (1..MAX_RATE Гц); следующий шаг — через новый tick
+        self.tick = 1.0 / max(1, min(MAX_RATE, hz))
@@ -0,0 +1,143 @@
+# Отрисовка по грязным прямоугольникам: статичные части пульта рисуются
+# один раз в фон, а каждый кадр перерисовываются только области, чьё
+# состояние изменилось, и на экран уходит pygame.display.update(rects).
+# Если ничего не поменялось, кадр ничего не рисует.
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+
+class DirtyRenderer:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.items = []
+        self.layers = []
+        self.full_redraw = True
+        self.profiler = None  # profiling.FrameProfiler — время по элементам
+
+    def add(self, rect, key, draw, name='item'):
+        # rect — область элемента, key() — его состояние, draw(surface) — отрисовка
+        self.items.append([pygame.Rect(rect), key, draw, None, name])
+
+    def add_layer(self, layer):
+        # Слой сам сравнивает состояние и возвращает изменившиеся прямоугольники
+        self.layers.append(layer)
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def restore(self, rect):
+        self.screen.blit(self.background, rect, rect)
+
+    def render(self):
+        full = self.full_redraw
+        if full:
+            self.screen.blit(self.background, (0, 0))
+        profiler = self.profiler
+        dirty = []
+        for item in self.items:
+            rect, key, draw, last, name = item
+            state = key()
+            if full or state != last:
+                self.restore(rect)
+                draw(self.screen)
+                item[3] = state
+                dirty.append(rect)
+                if profiler is not None:
+                    profiler.mark(name)
+        for layer in self.layers:
+            dirty.extend(layer.render(self, full))
+            if profiler is not None:
+                profiler.mark(layer.name)
+        if full:
+            self.full_redraw = False
+            pygame.display.flip()
+            dirty = [self.screen.get_rect()]
+        elif dirty:
+            pygame.display.update(dirty)
+        if profiler is not None:
+            profiler.mark('display')
+        return dirty
+
+
+class TileAtlas:
+    # Все виды клетки на одной поверхности (sprite sheet): клетка кода k —
+    # область areas[k]. Заготовки заранее наложены на цвет фона под клетками,
+    # поэтому атлас непрозрачный: клетка рисуется поверх старой без
+    # восстановления фона и без попиксельной альфы
+    def __init__(self, tiles, backdrop):
+        w, h = next(iter(tiles.values())).get_size()
+        count = max(tiles) + 1
+        self.surface = pygame.Surface((w * count, h)).convert()
+        self.surface.fill(backdrop)
+        self.areas = [pygame.Rect(code * w, 0, w, h) for code in range(count)]
+        for code, tile in tiles.items():
+            self.surface.blit(tile, self.areas[code])
+
+    def batch(self, rects, codes):
+        # Последовательность для Surface.blits: (атлас, куда, откуда)
+        surface, areas = self.surface, self.areas
+        return [(surface, rect, areas[code]) for rect, code in zip(rects, codes)]
+
+
+class TileLayer:
+    # Много однотипных клеток (стержни): состояние — массив кодов, отличия
+    # ищутся векторно, изменившиеся клетки рисуются из атласа одним вызовом
+    # Surface.blits. Если поменялась заметная часть клеток (АЗ-5 на полной
+    # зоне), на экран уходит один общий прямоугольник вместо сотен
+    def __init__(self, rects, codes, atlas, name='tiles'):
+        self.name = name
+        self.rects = [pygame.Rect(r) for r in rects]
+        self.bounds = self.rects[0].unionall(self.rects) if self.rects else pygame.Rect(0, 0, 0, 0)
+        self.codes = codes  # codes() -> np.ndarray кодов по клеткам
+        self.atlas = atlas
+        self.last = None
+
+    def render(self, renderer, full):
+        codes = self.codes()
+        if full or self.last is None:
+            changed = np.arange(len(self.rects))
+        else:
+            changed = np.flatnonzero(codes != self.last)
+        self.last = codes.copy()
+        if not len(changed):
+            return []
+        changed = changed.tolist()
+        rects = [self.rects[k] for k in changed]
+        renderer.screen.blits(self.atlas.batch(rects, codes[changed].tolist()), doreturn=False)
+        if len(changed) * 4 > len(self.rects):
+            return [self.bounds]
+        return rects
+
+
+class TextCache:
+    # Ограниченный LRU-кэш растеризованного текста: ключ — (шрифт, текст,
+    # цвет). Набор значений на пульте маленький (цифры ламп, температура),
+    # так что почти всё берётся из кэша вместо font.render
+    def __init__(self, size=512):
+        self.size = size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.size:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.surfaces)}
@@ -0,0 +1,138 @@
+# Хранилище стержней в виде набора массивов NumPy (struct-of-arrays).
+# Одно векторное обновление за шаг вместо обхода списка объектов,
+# выбор стержней — булевой маской.
+import numpy as np
+
+# --- Состояния стержня ---
+INSERTED = 0  # вставлен
+RAISING = 1  # поднимается
+RAISED = 2  # полностью поднят
+LOWERING = 3  # опускается
+
+# --- Полноразмерная зона РБМК: ~1661 канал, ~211 стержней СУЗ ---
+RBMK_GRID = 49
+RBMK_RADIUS = 23
+
+
+def core_cells(grid, radius):
+    # Все ячейки сетки внутри скруглённой зоны
+    c = grid // 2
+    i, j = np.indices((grid, grid))
+    mask = (j - c) ** 2 + (i - c) ** 2 <= radius ** 2
+    return i[mask], j[mask]
+
+
+def rbmk_rod_cells(grid=RBMK_GRID, radius=RBMK_RADIUS):
+    # Стержни СУЗ стоят в каждом ~8-м канале (шахматный шаг 2x4)
+    i, j = core_cells(grid, radius)
+    mask = (i % 2 == 0) & (j % 4 == i % 4)
+    return i[mask], j[mask]
+
+
+class RodArray:
+    def __init__(self, i, j, grid, max_selected=4):
+        self.i = np.asarray(i, dtype=np.int16)
+        self.j = np.asarray(j, dtype=np.int16)
+        self.n = len(self.i)
+        self.grid = grid
+        self.max_selected = max_selected
+        self.state = np.full(self.n, INSERTED, dtype=np.int8)
+        self.start_time = np.zeros(self.n, dtype=np.float64)
+        self.position = np.zeros(self.n, dtype=np.float32)  # 0 — вставлен, 1 — извлечён
+        self.selected = np.zeros(self.n, dtype=bool)
+        self.n_selected = 0  # счётчик выбранных — проверка лимита без обхода маски
+        self.n_moving = 0  # сколько стержней сейчас в движении
+        # (i, j) -> номер стержня, -1 если в ячейке стержня нет
+        self.index = np.full((grid, grid), -1, dtype=np.int32)
+        self.index[self.i, self.j] = np.arange(self.n)
+
+    def __len__(self):
+        return self.n
+
+    def find(self, i, j):
+        if 0 <= i < self.grid and 0 <= j < self.grid:
+            return int(self.index[i, j])
+        return -1
+
+    # --- Выбор ---
+
+    def select(self, i, j):
+        # O(1): номер стержня по сетке, членство — по маске, лимит — по счётчику
+        k = self.find(i, j)
+        if k < 0 or self.selected[k]:
+            return False
+        if self.n_selected >= self.max_selected:
+            return False
+        self.selected[k] = True
+        self.n_selected += 1
+        return True
+
+    def clear_selection(self):
+        self.selected[:] = False
+        self.n_selected = 0
+
+    def set_selection(self, mask):
+        # Выбор целиком по маске (восстановление снимка, готовые наборы стержней)
+        self.selected[:] = mask
+        self.n_selected = int(np.count_nonzero(self.selected))
+
+    # --- Движение ---
+
+    def start_raising(self, now, mask=None):
+        if mask is None:
+            mask = self.selected
+        mask = mask & (self.state == INSERTED)
+        self.state[mask] = RAISING
+        self.start_time[mask] = now
+        self.n_moving += int(np.count_nonzero(mask))
+        return mask
+
+    def start_lowering(self, now, mask=None):
+        if mask is None:
+            mask = self.selected
+        mask = mask & (self.state == RAISED)
+        self.state[mask] = LOWERING
+        self.start_time[mask] = now
+        self.n_moving += int(np.count_nonzero(mask))
+        return mask
+
+    def drop(self, now, travel_time):
+        # Все невставленные стержни идут вниз с текущих положений (АЗ-5, сброс муфт)
+        self.n_moving += int(np.count_nonzero(self.state == RAISED))
+        mask = (self.state == RAISING) | (self.state == RAISED)
+        self.state[mask] = LOWERING
+        self.start_time[mask] = now - (1.0 - self.position[mask]) * travel_time
+        return mask
+
+    def end_times(self, mask, travel_time):
+        # Когда доедут стержни маски: {время окончания: номера стержней}
+        idx = np.flatnonzero(mask)
+        ends = self.start_time[idx] + travel_time
+        times, inverse = np.unique(ends, return_inverse=True)
+        return {float(t): idx[inverse == k] for k, t in enumerate(times)}
+
+    def finish(self, idx, now, travel_time):
+        # Переводит доехавшие стержни из idx в конечное состояние. Стержни,
+        # которые с тех пор сменили направление, пропускаются — для них
+        # поставлено своё событие
+        elapsed = now - self.start_time[idx]
+        done = idx[(elapsed >= travel_time - 1e-9) & ((self.state[idx] == RAISING) | (self.state[idx] == LOWERING))]
+        raising = done[self.state[done] == RAISING]
+        lowering = done[self.state[done] == LOWERING]
+        self.state[raising] = RAISED
+        self.position[raising] = 1.0
+        self.state[lowering] = INSERTED
+        self.position[lowering] = 0.0
+        self.n_moving -= len(done)
+        return len(done)
+
+    def update(self, now, travel_time):
+        # Положения движущихся стержней; окончание хода приходит событием
+        # (finish), поэтому без движения шаг ничего не делает
+        if self.n_moving == 0:
+            return 0
+        raising = self.state == RAISING
+        moving = raising | (self.state == LOWERING)
+        progress = np.minimum((now - self.start_time[moving]) / travel_time, 1.0)
+        self.position[moving] = np.where(raising[moving], progress, 1.0 - progress)
+        return self.n_moving
@@ -0,0 +1,228 @@
+# Сценарии оператора для регрессионных прогонов учебных программ.
+# Сценарий — текст: моменты времени, действия пульта и проверки показаний.
+# Операторы разделяются переводом строки или ';', '#' — комментарий.
+#
+#   name Подъём мощности и глушение
+#   t=10 select (4,4),(4,5); raise
+#   t=40 ГЦН -
+#   t=95 АЗ-5
+#   t=150 expect sfkre < 50; expect exploded = нет
+#
+# Файл .py может задать много сценариев сразу: список SCENARIOS из текстов
+# или объектов Scenario. Прогон идёт без окна и без реального времени —
+# симуляция прыгает от события к событию, сценарии распределяются по процессам:
+#
+#   python scenario.py run scenarios/            # все *.scn и *.py в каталоге
+#   python scenario.py run a.scn b.scn -j 8 -v
+#
+# Код возврата 1, если хоть одна проверка не прошла.
+import argparse
+import glob
+import operator
+import os
+import re
+import runpy
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from reactor import CORE_RADIUS, ROD_GRID, ReactorSim
+from rods import core_cells
+
+# Команды пульта: имя в сценарии -> действие ReactorSim
+COMMANDS = {
+    'select': 'select_rod', 'выбрать': 'select_rod',
+    'reset': 'reset_selection', 'сброс': 'reset_selection',
+    'raise': 'raise_rods', 'поднять': 'raise_rods',
+    'lower': 'lower_rods', 'опустить': 'lower_rods',
+    'az5': 'az5_action', 'аз-5': 'az5_action',
+    'saor': 'saor_action', 'саор': 'saor_action',
+    'гцн -': 'toggle_cooling_low', 'cooling -': 'toggle_cooling_low',
+    'гцн +': 'toggle_cooling_high', 'cooling +': 'toggle_cooling_high',
+    'апз': 'toggle_auto_protect', 'auto_protect': 'toggle_auto_protect',
+    'муф': 'muf_switch_action', 'muf': 'muf_switch_action',
+}
+# Величины, которые можно проверять
+QUANTITIES = {
+    'sfkre': lambda sim: sim.sfkre,
+    'temperature': lambda sim: sim.temperature,
+    'exploded': lambda sim: sim.exploded,
+    'az5_count': lambda sim: sim.az5_count,
+    'xenon': lambda sim: sim.xenon,
+}
+COMPARE = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+BOOLEANS = {'да': True, 'yes': True, 'true': True, 'нет': False, 'no': False, 'false': False}
+EXTENSIONS = ('.scn', '.py')
+
+TIME_RE = re.compile(r'^t\s*=\s*(\d+(?:\.\d*)?)\s*(.*)$')
+CELL_RE = re.compile(r'\(\s*(\d+)\s*,\s*(\d+)\s*\)')
+EXPECT_RE = re.compile(r'^expect\s+(\w+)\s*(<=|>=|==|!=|<|>|=)\s*(\S+)$')
+# Ячейки со стержнями учебной зоны, на которой идёт прогон (стержень в каждой ячейке зоны)
+ROD_CELLS = set(zip(*(a.tolist() for a in core_cells(ROD_GRID, CORE_RADIUS))))
+
+Check = namedtuple('Check', 'time quantity op value line')
+Scenario = namedtuple('Scenario', 'name actions checks duration')
+
+
+def number(text, where, statement):
+    # Ошибка указывает строку сценария, а не только само значение
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"{where}: ожидалось число '{text.strip()}' в '{statement}'") from None
+
+
+def parse(text, name='<сценарий>'):
+    # Текст -> Scenario; ошибки с номером строки, как их увидит автор сценария
+    actions, checks = [], []
+    t = 0.0
+    duration = None
+    latest = None  # самое позднее действие или проверка: (время, строка)
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        where = f"{name}:{lineno}"
+        for statement in raw.split('#', 1)[0].split(';'):
+            statement = ' '.join(statement.split())
+            m = TIME_RE.match(statement)
+            if m:
+                t = float(m.group(1))
+                statement = m.group(2)
+            if not statement:
+                continue
+            words = statement.lower()
+            if not words.startswith(('name ', 'duration ')) and (latest is None or t > latest[0]):
+                latest = (t, where)
+            if words.startswith('name '):
+                name = statement[5:]
+            elif words.startswith('duration '):
+                duration = number(statement[9:], where, statement)
+            elif words.startswith('expect'):
+                m = EXPECT_RE.match(words)
+                if m is None or m.group(1) not in QUANTITIES:
+                    raise ValueError(f"{where}: непонятная проверка '{statement}'")
+                quantity, op, value = m.groups()
+                value = BOOLEANS[value] if value in BOOLEANS else number(value, where, statement)
+                checks.append(Check(t, quantity, op, value, lineno))
+            elif words.startswith(('select', 'выбрать')):
+                cells = CELL_RE.findall(statement)
+                if not cells:
+                    raise ValueError(f"{where}: не указаны ячейки '{statement}'")
+                for i, j in cells:
+                    if (int(i), int(j)) not in ROD_CELLS:
+                        raise ValueError(f"{where}: нет стержня в ячейке ({i},{j})")
+                actions.extend((t, 'select_rod', int(i), int(j)) for i, j in cells)
+            elif words in COMMANDS:
+                actions.append((t, COMMANDS[words]))
+            else:
+                raise ValueError(f"{where}: неизвестная команда '{statement}'")
+    if duration is None:
+        duration = max([a[0] for a in actions] + [c.time for c in checks] + [0.0])
+    elif latest is not None and latest[0] > duration:
+        raise ValueError(f"{latest[1]}: t={latest[0]:g} позже конца сценария (duration {duration:g})")
+    return Scenario(name, actions, checks, duration)
+
+
+def load(path):
+    # Сценарии файла: один из .scn или список SCENARIOS из .py
+    if path.endswith('.py'):
+        items = runpy.run_path(path)['SCENARIOS']
+        return [parse(item, f"{path}[{k}]") if isinstance(item, str) else item for k, item in enumerate(items)]
+    with open(path, encoding='utf-8') as f:
+        return [parse(f.read(), path)]
+
+
+def run(scenario):
+    # Действия и проверки в порядке времени; при равном времени сначала действия
+    sim = ReactorSim()
+    events = sorted([(a[0], 0, k) for k, a in enumerate(scenario.actions)] +
+                    [(c.time, 1, k) for k, c in enumerate(scenario.checks)])
+    failures = []
+    for when, kind, k in events:
+        if when > scenario.duration:
+            if kind == 1:
+                check = scenario.checks[k]
+                failures.append(f"строка {check.line}, t={check.time:g}: проверка позже конца сценария "
+                                f"({scenario.duration:g} с)")
+            continue
+        if when > sim.time:
+            sim.advance_to(when)
+        if kind == 0:
+            name, args = scenario.actions[k][1], scenario.actions[k][2:]
+            getattr(sim, name)(*args)
+        else:
+            check = scenario.checks[k]
+            actual = QUANTITIES[check.quantity](sim)
+            if not COMPARE[check.op](actual, check.value):
+                failures.append(f"строка {check.line}, t={check.time:g}: {check.quantity} {check.op} "
+                                f"{check.value} не выполнено ({actual})")
+    if scenario.duration > sim.time:
+        sim.advance_to(scenario.duration)
+    return {
+        'name': scenario.name,
+        'checks': len(scenario.checks),
+        'failures': failures,
+        'exploded': sim.exploded,
+        'sfkre': sim.sfkre,
+    }
+
+
+def load_all(files):
+    # Разбор в главном процессе: ошибки загрузки — такие же непрошедшие сценарии
+    scenarios, broken = [], []
+    for path in files:
+        try:
+            scenarios.extend(load(path))
+        except (OSError, ValueError, KeyError) as e:
+            broken.append({'name': path, 'checks': 0, 'failures': [f"не загружен: {e}"],
+                           'exploded': False, 'sfkre': 0})
+    return scenarios, broken
+
+
+def collect(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(p for ext in EXTENSIONS for p in glob.glob(os.path.join(path, '*' + ext))))
+        else:
+            files.append(path)
+    return files
+
+
+def run_all(scenarios, workers=None):
+    # Сценарии по процессам пачками; порядок результатов — порядок сценариев
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(scenarios) < 2:
+        return [run(scenario) for scenario in scenarios]
+    chunk = max(1, len(scenarios) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, scenarios, chunksize=chunk))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сценарии оператора РБМК-1000")
+    sub = parser.add_subparsers(dest='mode', required=True)
+    go = sub.add_parser('run', help="прогнать сценарии и проверить показания")
+    go.add_argument('paths', nargs='+', help="файлы .scn/.py или каталоги")
+    go.add_argument('-j', '--workers', type=int, default=None, help="число процессов (по умолчанию все ядра)")
+    go.add_argument('-v', '--verbose', action='store_true', help="печатать и прошедшие сценарии")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    scenarios, results = load_all(collect(args.paths))
+    results += run_all(scenarios, args.workers)
+    failed = [r for r in results if r['failures']]
+    for r in results:
+        if r['failures'] or args.verbose:
+            print(f"{'FAIL' if r['failures'] else 'ok  '} {r['name']}")
+        for failure in r['failures']:
+            print(f"     {failure}")
+    print(f"сценариев: {len(results)}, проверок: {sum(r['checks'] for r in results)}, "
+          f"не прошло: {len(failed)} за {time.perf_counter() - started:.2f} с")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
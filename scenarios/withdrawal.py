@@ -0,0 +1,52 @@
+# Учебная программа «вывод стержней»: стержни поднимаются группами по 4
+# каждые 10 с. С АПЗ оператор прекращает вывод после срабатывания защиты:
+# на усиленном расходе ГЦН реактор глушится, а на маловодном режиме АЗ-5
+# спасает от взрыва, но пар в горячих каналах держит мощность около четверти
+# номинала и со всеми вставленными стержнями. Без АПЗ реактор разгоняется до
+# взрыва, а усиленный расход ГЦН лишь оттягивает его.
+from reactor import ReactorSim
+
+sim = ReactorSim()
+cells = list(zip(sim.rods.i.tolist(), sim.rods.j.tolist()))
+
+
+def withdrawal(interval=10, until=None):
+    # Группы до момента until (не включая) — дальше оператор стержни не трогает
+    lines = []
+    for k in range(0, len(cells), 4):
+        t = k // 4 * interval
+        if until is not None and t >= until:
+            break
+        group = ','.join(f"({i},{j})" for i, j in cells[k:k + 4])
+        lines.append(f"t={t} reset; select {group}; raise")
+    return '\n'.join(lines)
+
+
+SCENARIOS = [
+    # АПЗ срабатывает на 90-й секунде — последняя группа поднята на 80-й
+    f"""name Вывод стержней, ГЦН +: АПЗ глушит реактор
+t=0 ГЦН +
+{withdrawal(until=90)}
+t=90 expect az5_count >= 1
+t=600 expect exploded = нет; expect sfkre < 50
+""",
+    # АПЗ срабатывает на 72-й секунде — последняя группа поднята на 70-й
+    f"""name Вывод стержней, ГЦН -: АПЗ не даёт взрыва, паровой эффект держит мощность
+t=0 ГЦН -
+{withdrawal(until=72)}
+t=80 expect az5_count >= 1
+t=600 expect exploded = нет; expect sfkre > 500; expect sfkre < 1000
+""",
+    f"""name Вывод стержней без АПЗ: взрыв
+t=0 АПЗ
+{withdrawal()}
+t=60 expect exploded = нет
+t=120 expect exploded = да; expect az5_count = 0
+""",
+    f"""name Вывод стержней без АПЗ, ГЦН +: взрыв позже
+t=0 АПЗ; ГЦН +
+{withdrawal()}
+t=120 expect exploded = нет
+t=200 expect exploded = да
+""",
+]
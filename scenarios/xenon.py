@@ -0,0 +1,39 @@
+# Учебная программа «йодная яма»: шесть часов работы на мощности, глушение
+# АЗ-5 и подъём тех же стержней через пять часов. Ксенон после глушения
+# растёт, и реактор выходит на заметно меньшую мощность, чем при подъёме
+# сразу после глушения.
+from reactor import ReactorSim
+
+sim = ReactorSim()
+cells = list(zip(sim.rods.i.tolist(), sim.rods.j.tolist()))[::3]
+
+
+def raise_third(t):
+    # Каждый третий стержень, группами по 4 (больше пульт не выбирает)
+    lines = []
+    for k in range(0, len(cells), 4):
+        group = ','.join(f"({i},{j})" for i, j in cells[k:k + 4])
+        lines.append(f"t={t + k // 4 * 10} reset; select {group}; raise")
+    return '\n'.join(lines)
+
+
+SCENARIOS = [
+    f"""name Йодная яма: глушение после 6 ч на мощности
+t=0 ГЦН +
+{raise_third(0)}
+t=900 expect sfkre > 1000
+t=21600 expect xenon > 0.1
+t=21600 АЗ-5
+t=21600 expect xenon < 0.2
+t=39600 expect xenon > 0.25
+{raise_third(39600)}
+t=40500 expect sfkre < 600
+""",
+    f"""name Без йодной ямы: подъём сразу после глушения
+t=0 ГЦН +
+{raise_third(0)}
+t=21600 АЗ-5
+{raise_third(21700)}
+t=22600 expect sfkre > 700
+""",
+]
@@ -0,0 +1,38 @@
+# Планировщик событий во времени симуляции на очереди с приоритетом (heapq).
+# Окончания хода стержней и истечения кулдаунов ставятся в очередь один раз,
+# и шаг трогает только то, что действительно сработало, — стоимость шага
+# зависит от активности, а не от числа стержней.
+import heapq
+
+
+class Scheduler:
+    def __init__(self):
+        self.queue = []
+        # Порядковый номер: события на одно время срабатывают в порядке постановки
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def at(self, when, callback, *args):
+        heapq.heappush(self.queue, (when, self.seq, callback, args))
+        self.seq += 1
+
+    def run_until(self, now):
+        # Выполняет все события со временем <= now; callback получает время события
+        fired = 0
+        queue = self.queue
+        while queue and queue[0][0] <= now:
+            when, _, callback, args = heapq.heappop(queue)
+            callback(when, *args)
+            fired += 1
+        return fired
+
+    def snapshot(self):
+        # Очередь в виде, пригодном для снимка: методы-обработчики — по имени
+        return self.seq, tuple((when, seq, callback.__name__, args) for when, seq, callback, args in self.queue)
+
+    def restore(self, owner, state):
+        # Обработчики снова привязываются к owner
+        self.seq, queue = state
+        self.queue = [(when, seq, getattr(owner, name), args) for when, seq, name, args in queue]
@@ -0,0 +1,288 @@
+# Сетевой пульт: asyncio-сервер ведёт единственный авторитетный ReactorSim,
+# принимает команды оператора от многих клиентов по TCP (JSON по строкам) и
+# рассылает только изменения состояния. Кадр кодируется один раз на всех
+# клиентов; медленный клиент не тормозит симуляцию — его кадры пропускаются,
+# а когда буфер освободится, он получает полное состояние заново.
+#
+#   python server.py serve --port 7000
+#   python server.py bench --clients 50 --seconds 10
+#
+# Клиент -> сервер: {"cmd": "select_rod", "args": [4, 4]}
+# Сервер -> клиент: {"type": "full", ...} при подключении, затем
+#                   {"type": "delta", "time": ..., "sfkre": ..., "rods": [[k, state, selected], ...], "events": [...]}
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from metrics import MetricsExport
+from profiling import FrameProfiler
+from reactor import ReactorSim
+
+HOST = '127.0.0.1'
+PORT = 7000
+RATE = 60  # кадров рассылки в секунду
+MAX_BUFFER = 256 * 1024  # байт неотправленного у клиента — дальше кадры ему пропускаются
+# Команды, доступные клиентам: кнопки пульта. Частота физики (set_rate) — в
+# журнале действий, но общая симуляция не должна меняться по команде курсанта
+PANEL_COMMANDS = (
+    'select_rod', 'reset_selection', 'raise_rods', 'lower_rods',
+    'az5_action', 'saor_action', 'toggle_cooling_low', 'toggle_cooling_high',
+    'toggle_auto_protect', 'muf_switch_action',
+)
+
+
+def scalars(sim):
+    return {
+        'time': round(sim.time, 3),
+        'sfkre': sim.sfkre,
+        'temperature': int(sim.temperature),
+        'cooling': sim.cooling_mode,
+        'auto_protect': sim.auto_protection_enabled,
+        'exploded': sim.exploded,
+        'az5_alarm': sim.az5_alarm,
+    }
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.needs_full = True
+        self.dropped = 0
+
+
+class ControlRoomServer:
+    def __init__(self, sim, rate=RATE, max_buffer=MAX_BUFFER):
+        self.sim = sim
+        self.rate = rate
+        self.max_buffer = max_buffer
+        self.clients = set()
+        self.last = scalars(sim)
+        self.last_state = sim.rods.state.copy()
+        self.last_selected = sim.rods.selected.copy()
+        self.frames = 0
+        self.commands = 0
+        self.server = None
+        self.profiler = None  # profiling.FrameProfiler — время кадра рассылки
+
+    def full_state(self):
+        rods = self.sim.rods
+        message = {'type': 'full'}
+        message.update(scalars(self.sim))
+        message['rods'] = {
+            'i': rods.i.tolist(),
+            'j': rods.j.tolist(),
+            'state': rods.state.tolist(),
+            'selected': rods.selected.tolist(),
+        }
+        return encode(message)
+
+    def delta(self):
+        # Только изменившиеся величины и стержни с прошлого кадра
+        sim = self.sim
+        rods = sim.rods
+        current = scalars(sim)
+        message = {k: v for k, v in current.items() if self.last[k] != v and k != 'time'}
+        changed = np.flatnonzero((rods.state != self.last_state) | (rods.selected != self.last_selected))
+        if len(changed):
+            message['rods'] = [[k, s, sel] for k, s, sel in zip(
+                changed.tolist(), rods.state[changed].tolist(), rods.selected[changed].tolist())]
+            self.last_state[changed] = rods.state[changed]
+            self.last_selected[changed] = rods.selected[changed]
+        events = sim.pop_events()
+        if events:
+            message['events'] = events
+        self.last = current
+        if not message:
+            return None
+        message['type'] = 'delta'
+        message['time'] = current['time']
+        return encode(message)
+
+    def broadcast(self, frame):
+        full = None
+        for client in list(self.clients):
+            transport = client.writer.transport
+            if transport.is_closing():
+                self.clients.discard(client)
+                continue
+            if transport.get_write_buffer_size() > self.max_buffer:
+                # Клиент не успевает: дельты ему теряют смысл, догонит полным кадром
+                client.needs_full = True
+                client.dropped += 1
+                continue
+            if client.needs_full:
+                if full is None:
+                    full = self.full_state()
+                client.writer.write(full)
+                client.needs_full = False
+            elif frame is not None:
+                client.writer.write(frame)
+
+    def execute(self, message):
+        if not isinstance(message, dict):
+            return False
+        cmd = message.get('cmd')
+        if cmd not in PANEL_COMMANDS:
+            return False
+        # Аргументы проверяются до вызова: в журнал попадают только выполнимые нажатия
+        args = message.get('args', [])
+        if not isinstance(args, list) or len(args) != (2 if cmd == 'select_rod' else 0):
+            return False
+        if not all(type(a) is int and 0 <= a < self.sim.rods.grid for a in args):
+            return False
+        getattr(self.sim, cmd)(*args)
+        self.commands += 1
+        return True
+
+    async def handle(self, reader, writer):
+        client = Client(writer)
+        self.clients.add(client)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    self.execute(json.loads(line))
+                except ValueError:
+                    # Битый JSON не должен ронять пульт
+                    continue
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    async def run(self, host=HOST, port=PORT, duration=None):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self.rate
+        start = last = loop.time()
+        next_frame = start + period
+        try:
+            while duration is None or last - start < duration:
+                await asyncio.sleep(max(0.0, next_frame - loop.time()))
+                now = loop.time()
+                profiler = self.profiler
+                if profiler is not None:
+                    profiler.start_frame()
+                # Симуляция идёт реальным временем, команды уже применены в handle()
+                self.sim.step(now - last)
+                last = now
+                if profiler is not None:
+                    profiler.mark('step')
+                frame = self.delta()
+                if profiler is not None:
+                    profiler.mark('delta')
+                self.broadcast(frame)
+                if profiler is not None:
+                    profiler.mark('broadcast')
+                    profiler.end_frame()
+                self.frames += 1
+                next_frame += period
+                if next_frame < now:
+                    # Отстали (GC, перегрузка) — не пытаемся догнать пачкой кадров
+                    next_frame = now + period
+        finally:
+            self.server.close()
+            await self.server.wait_closed()
+            for client in list(self.clients):
+                client.writer.close()
+
+
+# --- Подставные клиенты для проверки на localhost ---
+
+async def stand_in_client(host, port, seconds, seed, stats):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+    received = 0
+
+    async def press():
+        # Оператор жмёт что-нибудь раз в пару секунд
+        while loop.time() < end:
+            await asyncio.sleep(rng.uniform(0.5, 3.0))
+            if rng.random() < 0.5:
+                message = {'cmd': 'select_rod', 'args': [rng.randrange(9), rng.randrange(9)]}
+            else:
+                message = {'cmd': rng.choice(('raise_rods', 'lower_rods', 'reset_selection', 'saor_action'))}
+            writer.write(encode(message))
+
+    presser = asyncio.create_task(press())
+    try:
+        while True:
+            line = await asyncio.wait_for(reader.readline(), max(0.01, end - loop.time()))
+            if not line:
+                break
+            json.loads(line)
+            received += 1
+    except asyncio.TimeoutError:
+        pass
+    presser.cancel()
+    writer.close()
+    stats.append(received)
+
+
+async def bench(clients, seconds, host=HOST, port=PORT):
+    server = ControlRoomServer(ReactorSim())
+    serving = asyncio.create_task(server.run(host, port, duration=seconds + 1.0))
+    await asyncio.sleep(0.2)
+    stats = []
+    started = time.perf_counter()
+    await asyncio.gather(*(stand_in_client(host, port, seconds, k, stats) for k in range(clients)))
+    elapsed = time.perf_counter() - started
+    await serving
+    print(f"клиентов: {clients}, кадров сервера: {server.frames} ({server.frames / (seconds + 1.0):.1f}/с), "
+          f"команд: {server.commands}")
+    print(f"сообщений на клиента: мин {min(stats)}, макс {max(stats)} за {elapsed:.1f} с")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сетевой пульт РБМК-1000")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    sub = parser.add_subparsers(dest='mode', required=True)
+    serve = sub.add_parser('serve', help="запустить сервер")
+    serve.add_argument('--rate', type=int, default=RATE, help="кадров рассылки в секунду")
+    serve.add_argument('--profile-log', metavar='PATH', help="писать сводку времени кадра (JSON по строкам)")
+    MetricsExport.add_arguments(serve)
+    load = sub.add_parser('bench', help="сервер и подставные клиенты в одном процессе")
+    load.add_argument('--clients', type=int, default=50)
+    load.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args(argv)
+
+    if args.mode == 'serve':
+        server = ControlRoomServer(ReactorSim(), rate=args.rate)
+        if args.profile_log:
+            server.profiler = FrameProfiler(args.rate, log=open(args.profile_log, 'w', encoding='utf-8'))
+        export = MetricsExport.from_args(args)
+        if export is not None:
+            if server.profiler is None:
+                server.profiler = FrameProfiler(args.rate)
+            export.watch(server.sim, 'server', server.profiler)
+        try:
+            asyncio.run(server.run(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if export is not None:
+                export.close()
+            if server.profiler is not None and server.profiler.log is not None:
+                server.profiler.log.close()
+        return 0
+    asyncio.run(bench(args.clients, args.seconds, args.host, args.port))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# Снимки состояния и перемотка. Snapshot — неизменяемый кортеж со всем
+# состоянием ReactorSim (массивы только для чтения). Timeline снимает
+# контрольную точку каждые interval шагов физики и ведёт журнал нажатий;
+# переход к моменту t — это восстановление ближайшей точки не позже t и
+# детерминированный прогон журнала вперёд, а не пересчёт с нуля. Точек не
+# больше limit: свежие идут часто, старые прореживаются.
+import bisect
+from collections import namedtuple
+
+import numpy as np
+
+# Шагов физики между контрольными точками. Считается в шагах, а не в секундах:
+# перемотка в недавнее прошлое прогоняет не больше interval шагов при любой
+# частоте физики — около 35 мс на полной зоне; снимок полной зоны ~136 КБ
+CHECKPOINT_INTERVAL = 100
+# Память против скорости перемотки. Без лимита полная зона съедала бы ~98 МБ
+# на час сессии при 20 Гц и ~490 МБ при 100 Гц. С лимитом точек не больше
+# MAX_CHECKPOINTS (~35 МБ на полной зоне, ~1.5 МБ на учебной): последние
+# RECENT_CHECKPOINTS не трогаются (у полной зоны при 20 Гц это ~5 минут с
+# перемоткой до 35 мс), а среди старых выбрасывается та, без которой
+# промежуток меньше всего относительно её давности. Шаг между старыми точками
+# растёт примерно пропорционально давности: на полной зоне перемотка к началу
+# двухчасовой сессии при 20 Гц — порядка секунды, через 8 часов — несколько
+# секунд. Больше лимит — быстрее дальняя перемотка и больше памяти
+MAX_CHECKPOINTS = 256
+RECENT_CHECKPOINTS = 64
+
+Snapshot = namedtuple('Snapshot', [
+    'time', 'last_update', 'tick', 'temperature', 'auto_protection_enabled',
+    'cooling_mode', 'exploded', 'explosion_time', 'rho', 'void', 'xenon',
+    'az5_count', 'auto_trips', 'az5_alarm', 'cooldowns', 'scheduled',
+    'rod_state', 'rod_start_time', 'rod_position', 'rod_selected', 'rods_moving',
+    'phi', 'coolant_temp', 'fuel_temp', 'graphite_temp', 'channel_void',
+    'iodine', 'xenon_field', 'xenon_energy', 'xenon_elapsed', 'n', 'c', 'h',
+])
+
+
+def frozen(array):
+    # Копия массива, которую нельзя изменить на месте
+    array = np.array(array)
+    array.flags.writeable = False
+    return array
+
+
+class Timeline:
+    def __init__(self, sim, interval=CHECKPOINT_INTERVAL, limit=MAX_CHECKPOINTS):
+        self.sim = sim
+        self.interval = interval
+        self.limit = max(limit, RECENT_CHECKPOINTS + 2)
+        self.checkpoints = [sim.snapshot()]
+        self.times = [sim.time]
+        self.end = sim.time  # самый поздний посчитанный момент — дальше вперёд перематывать некуда
+        self.ticks = 0  # шагов после последней контрольной точки
+        # Журнал нажатий (time, name, args) по возрастанию времени
+        self.actions = []
+        self.action_times = []
+        sim.observers.append(self)
+
+    # --- Наблюдатель ReactorSim ---
+
+    def record(self, sim, now):
+        # Снимок — состояние на конец шага физики now; при крупном dt время
+        # симуляции уже дальше, но следующие шаги ещё не посчитаны
+        self.end = max(self.end, now)
+        if now <= self.times[-1]:
+            # Прогон после перемотки внутри уже снятого отрезка
+            self.ticks = 0
+            return
+        self.ticks += 1
+        if self.ticks >= self.interval:
+            self.checkpoints.append(sim.snapshot()._replace(time=now))
+            self.times.append(now)
+            self.ticks = 0
+            if len(self.times) > self.limit:
+                self.thin()
+
+    def thin(self):
+        # Выбрасывает одну старую точку: ту, без которой промежуток меньше всего
+        # относительно её давности. Первая точка (начало сессии) и последние
+        # RECENT_CHECKPOINTS остаются
+        times, now = self.times, self.times[-1]
+        k = min(range(1, len(times) - RECENT_CHECKPOINTS),
+                key=lambda i: (times[i + 1] - times[i - 1]) / (now - times[i - 1]))
+        del self.checkpoints[k]
+        del times[k]
+
+    def action(self, now, name, args):
+        if self.sim.replaying:
+            return
+        # Живое нажатие после перемотки назад — ветка: будущее старой ветки отбрасывается
+        k = bisect.bisect_right(self.action_times, now)
+        del self.actions[k:]
+        del self.action_times[k:]
+        k = bisect.bisect_right(self.times, now)
+        del self.checkpoints[k:]
+        del self.times[k:]
+        self.ticks = round((now - self.times[-1]) / self.sim.tick)
+        self.end = now
+        self.actions.append((now, name, tuple(args)))
+        self.action_times.append(now)
+
+    # --- Перемотка ---
+
+    def seek(self, t):
+        # Ближайшая контрольная точка не позже t, затем журнал нажатий до t
+        sim = self.sim
+        k = max(0, bisect.bisect_right(self.times, t) - 1)
+        start = self.checkpoints[k].time
+        sim.restore(self.checkpoints[k])
+        # Остальные наблюдатели отбрасывают всё после контрольной точки: прогон
+        # ниже пройдёт этот отрезок заново, и время у них снова будет по порядку
+        for observer in sim.observers:
+            if observer is not self:
+                observer.rewind(sim, start)
+        # Нажатие в момент снимка сделано после него (снимок — конец шага физики)
+        first = bisect.bisect_left(self.action_times, start)
+        last = bisect.bisect_right(self.action_times, t)
+        sim.replaying = True
+        try:
+            for when, name, args in self.actions[first:last]:
+                sim.advance_to(when)
+                getattr(sim, name)(*args)
+            sim.advance_to(t)
+        finally:
+            sim.replaying = False
+        # События прогона (звуки) к моменту t уже неактуальны
+        sim.events = []
+        return sim
@@ -0,0 +1,229 @@
+# Бинарная телеметрия сессии: по кадру фиксированного размера на каждый шаг
+# физики (вектор состояния + упакованные по 2 бита состояния стержней) и
+# журнал нажатий на пульте в отдельном файле фиксированных записей.
+# Воспроизведение отображает файлы в память (np.memmap), поэтому переход к
+# любому шагу — O(1) без чтения всего файла.
+#
+#   python telemetry.py info session.tlm
+#   python telemetry.py dump session.tlm --from 100 --count 10
+import argparse
+import sys
+
+import numpy as np
+
+from reactor import OPERATOR_ACTIONS
+
+MAGIC = b'RBMKTLM1'
+# Заголовок: сигнатура, число стержней, сетка, размер кадра; за ним координаты стержней
+HEADER = np.dtype([('magic', 'S8'), ('n_rods', '<u4'), ('grid', '<u4'), ('frame_size', '<u4'), ('reserved', '<u4')])
+EVENTS_SUFFIX = '.ev'
+
+COOLING_CODES = ('normal', 'low', 'high')
+# Биты поля flags
+FLAG_AUTO_PROTECT = 1
+FLAG_EXPLODED = 2
+FLAG_AZ5_ALARM = 4
+
+# Действия оператора в журнале; номер в кортеже — код в файле
+ACTIONS = OPERATOR_ACTIONS
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+EVENT = np.dtype([('time', '<f8'), ('action', 'u1'), ('a', '<i2'), ('b', '<i2')])
+
+
+def frame_dtype(n_rods):
+    return np.dtype([
+        ('tick', '<u4'),
+        ('time', '<f8'),
+        ('power', '<f8'),  # доли номинала; СФКРЭ = power * P_NOMINAL
+        ('temperature', '<f4'),
+        ('rho', '<f4'),
+        ('void', '<f4'),
+        ('cooling', 'u1'),
+        ('flags', 'u1'),
+        ('rods', 'u1', ((2 * n_rods + 7) // 8,)),
+    ])
+
+
+def pack_states(state):
+    # Состояние стержня 0..3 — два бита
+    bits = np.unpackbits(state.astype(np.uint8)[:, None], axis=1)[:, 6:]
+    return np.packbits(bits.ravel())
+
+
+def unpack_states(packed, n_rods):
+    bits = np.unpackbits(packed)[:2 * n_rods].reshape(n_rods, 2)
+    return (bits[:, 0] * 2 + bits[:, 1]).astype(np.int8)
+
+
+class Recorder:
+    def __init__(self, sim, path):
+        rods = sim.rods
+        self.n_rods = len(rods)
+        self.dtype = frame_dtype(self.n_rods)
+        self.frame = np.zeros(1, dtype=self.dtype)
+        self.event = np.zeros(1, dtype=EVENT)
+        self.file = open(path, 'wb')
+        self.events_file = open(path + EVENTS_SUFFIX, 'wb')
+        header = np.zeros(1, dtype=HEADER)
+        header['magic'] = MAGIC
+        header['n_rods'] = self.n_rods
+        header['grid'] = rods.grid
+        header['frame_size'] = self.dtype.itemsize
+        self.file.write(header.tobytes())
+        self.file.write(rods.i.astype('<i2').tobytes())
+        self.file.write(rods.j.astype('<i2').tobytes())
+        self.offset = self.file.tell()  # начало кадров
+        self.frames = 0
+        self.events = 0
+        self.sim = sim
+        sim.observers.append(self)
+
+    def record(self, sim, now):
+        f = self.frame
+        f['tick'] = self.frames
+        f['time'] = now
+        f['power'] = sim.kinetics.n
+        f['temperature'] = sim.temperature
+        f['rho'] = sim.rho
+        f['void'] = sim.void
+        f['cooling'] = COOLING_CODES.index(sim.cooling_mode)
+        f['flags'] = (FLAG_AUTO_PROTECT * sim.auto_protection_enabled
+                      | FLAG_EXPLODED * sim.exploded
+                      | FLAG_AZ5_ALARM * sim.az5_alarm)
+        f['rods'][0] = pack_states(sim.rods.state)
+        self.file.write(f.tobytes())
+        self.frames += 1
+
+    def action(self, now, name, args):
+        e = self.event
+        e['time'] = now
+        e['action'] = ACTION_CODES[name]
+        e['a'], e['b'] = (tuple(args) + (-1, -1))[:2]
+        self.events_file.write(e.tobytes())
+        self.events += 1
+
+    def rewind(self, sim, start):
+        # Перемотка: кадры после start и нажатия с start — отброшенное будущее.
+        # Файлы обрезаются, прогон журнала запишет отрезок заново, поэтому
+        # время в файлах по-прежнему идёт по возрастанию (на этом стоит Replay)
+        self.frames = self._truncate(self.file, self.dtype, self.offset, self.frames, start, 'right')
+        self.events = self._truncate(self.events_file, EVENT, 0, self.events, start, 'left')
+
+    @staticmethod
+    def _truncate(file, dtype, offset, count, start, side):
+        file.flush()
+        if count:
+            times = np.memmap(file.name, dtype=dtype, mode='r', offset=offset, shape=(count,))['time']
+            count = int(np.searchsorted(times, start, side=side))
+            del times
+        file.truncate(offset + count * dtype.itemsize)
+        file.seek(0, 2)
+        return count
+
+    def close(self):
+        self.sim.observers.remove(self)
+        self.file.close()
+        self.events_file.close()
+
+
+class Replay:
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC:
+            raise ValueError(f"{path}: не файл телеметрии")
+        self.n_rods = int(header['n_rods'][0])
+        self.grid = int(header['grid'][0])
+        self.dtype = frame_dtype(self.n_rods)
+        coords = np.fromfile(path, dtype='<i2', count=2 * self.n_rods, offset=HEADER.itemsize)
+        self.rod_i = coords[:self.n_rods]
+        self.rod_j = coords[self.n_rods:]
+        offset = HEADER.itemsize + coords.nbytes
+        self.frames = self._map(path, self.dtype, offset)
+        self.events = self._map(path + EVENTS_SUFFIX, EVENT, 0)
+
+    @staticmethod
+    def _map(path, dtype, offset):
+        # Недописанный хвост кадра (сессия прервана) отбрасывается
+        try:
+            with open(path, 'rb') as f:
+                count = (f.seek(0, 2) - offset) // dtype.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count <= 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def index_at(self, t):
+        # Кадры идут подряд с шагом физики — номер кадра считается, а не ищется;
+        # если частоту физики меняли по ходу сессии, ищем двоичным поиском
+        n = len(self.frames)
+        if n == 0:
+            return -1
+        t0 = float(self.frames[0]['time'])
+        tick = float(self.frames[1]['time']) - t0 if n > 1 else 1.0
+        if abs(t0 + (n - 1) * tick - float(self.frames[n - 1]['time'])) < 1e-6:
+            return min(n - 1, max(0, int(round((t - t0) / tick))))
+        k = int(np.searchsorted(self.frames['time'], t, side='right'))
+        return min(n - 1, max(0, k - 1))
+
+    def frame(self, k):
+        return self.frames[k]
+
+    def rod_states(self, k):
+        return unpack_states(self.frames[k]['rods'], self.n_rods)
+
+    def actions_between(self, t0, t1):
+        # Нажатия с t0 < time <= t1; журнал упорядочен по времени
+        times = self.events['time']
+        lo, hi = np.searchsorted(times, [t0, t1], side='right')
+        return [(float(e['time']), ACTIONS[e['action']], int(e['a']), int(e['b']))
+                for e in self.events[lo:hi]]
+
+    def apply(self, sim, k):
+        # Переносит кадр k в симулятор — фронтенд рисует его как живой
+        f = self.frames[k]
+        sim.time = sim.last_update = float(f['time'])
+        sim.kinetics.n = sim.prev_n = float(f['power'])
+        sim.temperature = sim.prev_temperature = float(f['temperature'])
+        sim.rho = float(f['rho'])
+        sim.void = float(f['void'])
+        sim.cooling_mode = COOLING_CODES[f['cooling']]
+        flags = int(f['flags'])
+        sim.auto_protection_enabled = bool(flags & FLAG_AUTO_PROTECT)
+        sim.exploded = bool(flags & FLAG_EXPLODED)
+        sim.az5_alarm = bool(flags & FLAG_AZ5_ALARM)
+        sim.rods.state[:] = self.rod_states(k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Телеметрия сессии РБМК-1000")
+    parser.add_argument('command', choices=('info', 'dump'))
+    parser.add_argument('path')
+    parser.add_argument('--from', dest='start', type=int, default=0, help="первый кадр")
+    parser.add_argument('--count', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    replay = Replay(args.path)
+    if args.command == 'info':
+        print(f"стержней: {replay.n_rods}, сетка: {replay.grid}, кадров: {len(replay)}, "
+              f"размер кадра: {replay.dtype.itemsize} байт, нажатий: {len(replay.events)}")
+        if len(replay):
+            print(f"время: {replay.frames[0]['time']:.0f}..{replay.frames[-1]['time']:.0f} с")
+        return 0
+    for k in range(args.start, min(len(replay), args.start + args.count)):
+        f = replay.frame(k)
+        print(f"{f['time']:8.0f}  n={f['power']:.4f}  T={f['temperature']:7.1f}  "
+              f"rho={f['rho']:+.3f}$  {COOLING_CODES[f['cooling']]:6}  "
+              f"стержни: {np.bincount(replay.rod_states(k), minlength=4).tolist()}")
+    t0 = float(replay.frames[args.start]['time']) - 1 if len(replay) > args.start else 0
+    t1 = float(replay.frames[min(len(replay), args.start + args.count) - 1]['time']) if len(replay) else 0
+    for t, name, a, b in replay.actions_between(t0, t1):
+        print(f"{t:8.1f}  {name} {a if a >= 0 else ''} {b if b >= 0 else ''}".rstrip())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# Теплогидравлика по каналам активной зоны. У каждого канала свои
+# температуры топлива, графита и теплоносителя, расход воды и паросодержание;
+# всё хранится векторами по каналам зоны (порядок np.nonzero(mask)) и
+# считается одним проходом numpy на шаг физики.
+#
+#   расход     G = G_ГЦН / (1 + k·φ)          — пар в канале повышает сопротивление
+#   вода       Tв → T_вх + ΔTв·q / G          за τв
+#   топливо    Tт → Tв + ΔTт·q                за τт
+#   графит     Tг → Tв + ΔTг·q                за τг (медленно)
+#   пар        φ = (Tв − T_кип) / (ΔT_пар·G²), 0..1
+#
+# q — мощность канала в долях номинальной мощности среднего канала. Реакция
+# на ГЦН идёт через расход: меньше воды — горячее вода и больше пара, а пар
+# ещё сильнее душит расход в самых горячих каналах. Обратные связи по
+# реактивности берутся средними по зоне с весом ценности нейтронов.
+import copy
+import math
+
+import numpy as np
+
+T_INLET = 20  # °C на входе в каналы
+T_BOIL = 284
+COOLANT_RISE = 640  # °C нагрева воды в среднем канале на номинале при штатном расходе
+FUEL_RISE = 600  # °C перепада топливо — вода на номинале
+GRAPHITE_RISE = 50  # °C перепада графит — вода на номинале (γ-нагрев кладки)
+COOLANT_TAU = 5  # с
+FUEL_TAU = 3  # с
+GRAPHITE_TAU = 60  # с — кладка прогревается минутами
+VOID_RANGE = 1000  # °C от закипания до полного паросодержания при штатном расходе
+TWO_PHASE_DRAG = 1.5  # k — рост сопротивления канала при полном паросодержании
+# Расход ГЦН в долях штатного по режиму насосов
+PUMP_FLOW = {
+    'low': 1 / 1.2,
+    'normal': 1.0,
+    'high': 1 / 0.7,
+}
+
+
+class ChannelThermal:
+    def __init__(self, mask, weight=None):
+        self.mask = np.asarray(mask, dtype=bool)
+        self.channels = int(np.count_nonzero(self.mask))
+        # Вес канала в обратных связях (сумма — 1); по умолчанию все равны
+        if weight is None:
+            weight = np.full(self.channels, 1.0 / self.channels)
+        self.weight = np.asarray(weight, dtype=np.float64)
+        self.decay = {}  # dt -> множители релаксации, шаг физики один и тот же
+        self.reset()
+
+    def reset(self):
+        n = self.channels
+        self.coolant = np.full(n, float(T_INLET))
+        self.fuel = np.full(n, float(T_INLET))
+        self.graphite = np.full(n, float(T_INLET))
+        self.void = np.zeros(n)
+
+    def spawn(self):
+        # Новые каналы той же зоны: маска и веса общие, температуры свои
+        field = copy.copy(self)
+        field.reset()
+        return field
+
+    def _decay(self, dt):
+        factors = self.decay.get(dt)
+        if factors is None:
+            factors = self.decay[dt] = tuple(math.exp(-dt / tau) for tau in (COOLANT_TAU, FUEL_TAU, GRAPHITE_TAU))
+        return factors
+
+    def advance(self, dt, power, pump):
+        # power — мощность по каналам в долях среднего канала на номинале,
+        # pump — расход ГЦН в долях штатного
+        coolant_decay, fuel_decay, graphite_decay = self._decay(dt)
+        flow = pump / (1.0 + TWO_PHASE_DRAG * self.void)
+        target = T_INLET + COOLANT_RISE * power / flow
+        coolant = self.coolant
+        coolant -= target
+        coolant *= coolant_decay
+        coolant += target
+        np.maximum(coolant, T_INLET, out=coolant)
+        target = coolant + FUEL_RISE * power
+        self.fuel += (target - self.fuel) * (1.0 - fuel_decay)
+        target = coolant + GRAPHITE_RISE * power
+        self.graphite += (target - self.graphite) * (1.0 - graphite_decay)
+        np.clip((coolant - T_BOIL) / (VOID_RANGE * flow * flow), 0.0, 1.0, out=self.void)
+
+    def quench(self, delta):
+        # САОР: холодная вода в каналы, топливо остывает вместе с ней
+        np.maximum(self.coolant - delta, T_INLET, out=self.coolant)
+        np.maximum(self.fuel - delta, self.coolant, out=self.fuel)
+
+    def temperature(self):
+        # Показание пульта: средняя температура теплоносителя по каналам
+        return float(self.coolant.mean())
+
+    def feedback(self):
+        # Средние по зоне с весом ценности: топливо, графит, паросодержание
+        w = self.weight
+        return float(np.dot(w, self.fuel)), float(np.dot(w, self.graphite)), float(np.dot(w, self.void))